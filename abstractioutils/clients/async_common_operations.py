@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import weakref
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from abstractioutils.clients.common_operations import CommonOperations
+from abstractioutils.utils.log import get_logger
+
+if TYPE_CHECKING:
+    from abstractioutils.providers.gcp.cloud_run import CloudRun
+    from abstractioutils.clients.gcp_provider_pool import GcpProviders
+    from abstractioutils.dto.cluster_dto import ClusterDTO
+    from abstractioutils.dto.cluster_update import ClusterUpdate
+
+logger = get_logger(__name__)
+
+DEFAULT_CONCURRENCY_LIMITS = {
+    'dynamodb': 50,
+    'sqs': 50,
+    'sns': 50,
+    'ssm': 10,
+    'cloud_run': 20,
+    'compute_engine': 20
+}
+
+
+class AsyncCommonOperations(object):
+    # The providers are blocking, so every call runs on a bounded executor and waits on a per-service semaphore
+    def __init__(
+        self,
+        common_operations: CommonOperations = None,
+        max_workers: int = 64,
+        concurrency_limits: dict = None
+    ):
+        self._common_operations = common_operations if common_operations is not None else CommonOperations()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='abstractioutils')
+
+        self._concurrency_limits = dict(DEFAULT_CONCURRENCY_LIMITS)
+        self._concurrency_limits.update(concurrency_limits or dict())
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop, service: str) -> asyncio.Semaphore:
+        # A semaphore is bound to the loop it is first used on, so every running loop gets its own set
+        semaphores = self._semaphores.setdefault(loop, dict())
+        if service not in semaphores:
+            semaphores[service] = asyncio.Semaphore(self._concurrency_limits[service])
+        return semaphores[service]
+
+    async def _run(self, service: str, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore(loop=loop, service=service):
+            return await loop.run_in_executor(
+                self._executor,
+                functools.partial(function, *args, **kwargs)
+            )
+
+    async def get_cluster_information(self, cluster_id: str, consistent_read: bool = False) -> ClusterDTO:
+        return await self._run(
+            'dynamodb',
+            self._common_operations.get_cluster_information,
+            cluster_id=cluster_id,
+            consistent_read=consistent_read
+        )
+
+    async def get_cluster_fields(self, cluster_id: str, fields: list, consistent_read: bool = False) -> ClusterDTO:
+        return await self._run(
+            'dynamodb',
+            self._common_operations.get_cluster_fields,
+            cluster_id=cluster_id,
+            fields=fields,
+            consistent_read=consistent_read
+        )
+
+    async def update_cluster_information(
+        self,
+        cluster_id: str,
+        expression_attribute_names: dict,
+        expression_attribute_values: dict,
+        update_expression: str,
+        condition_expression: str = None
+    ) -> dict:
+        return await self._run(
+            'dynamodb',
+            self._common_operations.update_cluster_information,
+            cluster_id=cluster_id,
+            expression_attribute_names=expression_attribute_names,
+            expression_attribute_values=expression_attribute_values,
+            update_expression=update_expression,
+            condition_expression=condition_expression
+        )
+
+    async def apply_cluster_update(self, cluster_id: str, update: ClusterUpdate) -> dict:
+        return await self._run(
+            'dynamodb',
+            self._common_operations.apply_cluster_update,
+            cluster_id=cluster_id,
+            update=update
+        )
+
+    async def send_message_to_sqs(self, message_body: dict, queue_url: str) -> str:
+        return await self._run(
+            'sqs',
+            self._common_operations.send_message_to_sqs,
+            message_body=message_body,
+            queue_url=queue_url
+        )
+
+    async def publish_message_to_sns(self, message_body: dict, topic_arn: str) -> str:
+        return await self._run(
+            'sns',
+            self._common_operations.publish_message_to_sns,
+            message_body=message_body,
+            topic_arn=topic_arn
+        )
+
+    async def get_gcp_providers(self, project: str) -> GcpProviders:
+        # Only the first call for a project, or a rotation check, reaches SSM
+        return await self._run('ssm', self._common_operations.get_gcp_providers, project=project)
+
+    async def loop_over_cloud_run_service(
+        self,
+        cluster_id: str,
+        cloud_run_name: str,
+        region: str,
+        has_ip: bool,
+        static_ip: str,
+        cloud_run: CloudRun
+    ) -> bool:
+        logger.debug("Looping over the Cloud Run service %s...", cloud_run_name)
+
+        last_status = dict()
+        result = await self._common_operations._cloud_run_poller.poll_async(
+            probe=lambda: self._run(
+                'cloud_run',
+                self._common_operations._probe_cloud_run_service,
+                cloud_run=cloud_run,
+                cloud_run_name=cloud_run_name,
+                region=region,
+                last_status=last_status
+            ),
+            name=f'Cloud Run service {cloud_run_name}'
+        )
+        if not result.ready:
+            logger.error("Error while creating the Cloud Run service - %s", last_status)
+            return False
+
+        await self._run(
+            'dynamodb',
+            self._common_operations.set_cluster_completed,
+            cluster_id=cluster_id,
+            has_ip=has_ip,
+            static_ip=static_ip,
+            run_info=result.value
+        )
+        return True
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
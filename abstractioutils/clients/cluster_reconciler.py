@@ -0,0 +1,154 @@
+import os
+
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+
+from abstractioutils.clients.common_operations import CommonOperations
+
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.lazy_import import lazy_import
+
+cluster_codec = lazy_import('abstractioutils.dto.cluster_codec')
+cluster_update = lazy_import('abstractioutils.dto.cluster_update')
+
+logger = get_logger(__name__)
+
+COMPLETED_STATUS = 'COMPLETED'
+ERROR_STATUS = 'ERROR'
+
+# Only the attributes needed to match a record with its service are read from the table
+PROJECTION_ATTRIBUTES = ('id', 'gcp_project', 'region', 'status', 'endpoint')
+
+
+class ReconciliationReport(object):
+    def __init__(self):
+        self.clusters = 0
+        self.regions = 0
+        # Cluster ids without a Cloud Run service
+        self.missing = list()
+        # (project, region, service name) of services without a cluster record
+        self.orphaned = list()
+        # Dicts with cluster_id, recorded_status, actual_status, endpoint and error_message
+        self.mismatched = list()
+        self.fixed = list()
+        # Error message by (project, region) for the regions that could not be listed
+        self.errors = dict()
+        self.elapsed = 0
+
+
+class ClusterReconciler(object):
+    # Compares the clusters table with the Cloud Run services that actually exist. The table is scanned once,
+    # records are grouped by project and region and every region is listed once, the regions in parallel,
+    # so the number of GCP calls grows with the regions instead of the clusters.
+    def __init__(self, common_operations: CommonOperations = None, max_workers: int = 8, scan_segments: int = 1):
+        self._common_operations = common_operations if common_operations is not None else CommonOperations()
+        self._max_workers = max_workers
+        self._scan_segments = scan_segments
+
+    def _scan_clusters(self) -> dict:
+        # Records by (project, region), then by cluster id. Records without a project or region are skipped.
+        groups = dict()
+        items = self._common_operations._dynamodb.iter_scan(
+            table_name=os.environ.get('TABLE_CLUSTERS'),
+            projection_expression=', '.join(f'#{attribute}' for attribute in PROJECTION_ATTRIBUTES),
+            expression_attribute_names={f'#{attribute}': attribute for attribute in PROJECTION_ATTRIBUTES},
+            total_segments=self._scan_segments
+        )
+        for single_item in items:
+            values = cluster_codec.decode_attributes(single_item)
+            if values.get('project') and values.get('region'):
+                groups.setdefault((values['project'], values['region']), dict())[values['id']] = values
+        return groups
+
+    def _list_region(self, project: str, region: str) -> dict:
+        cloud_run = self._common_operations.get_gcp_providers(project=project).cloud_run
+        services = cloud_run.list_services(project_id=project, region=region)
+        return {single_service['metadata']['name']: single_service for single_service in services.get('items', [])}
+
+    @staticmethod
+    def _actual_status(service: dict):
+        # None while the service is still being deployed
+        for single_condition in service.get('status', dict()).get('conditions', []):
+            if single_condition['type'] == 'Ready':
+                if single_condition['status'] == 'True':
+                    return COMPLETED_STATUS, None
+                if single_condition['status'] == 'False':
+                    return ERROR_STATUS, single_condition.get('message')
+        return None, None
+
+    def _compare(self, report: ReconciliationReport, project: str, region: str, records: dict, services: dict) -> None:
+        for cluster_id, record in records.items():
+            service = services.get(cluster_id)
+            if service is None:
+                report.missing.append(cluster_id)
+                continue
+
+            actual_status, error_message = self._actual_status(service=service)
+            if actual_status is not None and actual_status != record.get('status'):
+                report.mismatched.append({
+                    'cluster_id': cluster_id,
+                    'recorded_status': record.get('status'),
+                    'actual_status': actual_status,
+                    'endpoint': service.get('status', dict()).get('url'),
+                    'error_message': error_message
+                })
+
+        for name in services.keys() - records.keys():
+            report.orphaned.append((project, region, name))
+
+    @staticmethod
+    def _fix_update(mismatch: dict):
+        # The endpoint and error message are only written when the service reports one
+        changes = {'status': mismatch['actual_status']}
+        for field in ('endpoint', 'error_message'):
+            if mismatch[field]:
+                changes[field] = mismatch[field]
+        return cluster_update.ClusterUpdate(changes=changes)
+
+    def _fix_all(self, report: ReconciliationReport) -> None:
+        # DynamoDB has no batched update, the updates run concurrently instead
+        results = self._common_operations.apply_cluster_updates(
+            updates={mismatch['cluster_id']: self._fix_update(mismatch=mismatch) for mismatch in report.mismatched},
+            max_workers=self._max_workers
+        )
+        report.fixed = [cluster_id for cluster_id, result in results.items() if not isinstance(result, Exception)]
+
+    def reconcile(self, fix: bool = False) -> ReconciliationReport:
+        report = ReconciliationReport()
+        start = monotonic()
+
+        groups = self._scan_clusters()
+        report.clusters = sum(len(records) for records in groups.values())
+        report.regions = len(groups)
+
+        def list_region(key: tuple):
+            try:
+                return key, self._list_region(project=key[0], region=key[1]), None
+            except Exception as exc:
+                return key, None, exc
+
+        if groups:
+            with ThreadPoolExecutor(max_workers=min(self._max_workers, len(groups))) as executor:
+                for key, services, error in executor.map(list_region, groups):
+                    if error is not None:
+                        logger.error("Error while listing the services of %s in %s - %s", key[0], key[1], error)
+                        report.errors[key] = error.__str__()
+                        continue
+                    self._compare(report=report, project=key[0], region=key[1], records=groups[key], services=services)
+
+        if fix:
+            self._fix_all(report=report)
+
+        report.elapsed = monotonic() - start
+        logger.info(
+            "Reconciled %s clusters in %s regions in %.2fs - missing: %s, orphaned: %s, mismatched: %s, fixed: %s",
+            report.clusters,
+            report.regions,
+            report.elapsed,
+            len(report.missing),
+            len(report.orphaned),
+            len(report.mismatched),
+            len(report.fixed),
+            extra={'operation': 'reconcile'}
+        )
+        return report
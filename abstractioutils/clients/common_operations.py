@@ -1,162 +1,299 @@
+from __future__ import annotations
+
 import os
+import re
+import warnings
+import itertools
+import threading
 
-from time import sleep
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
 
-from abstractioutils.providers.aws.dynamodb import DynamoDB
+from abstractioutils.providers.aws.dynamodb import DynamoDB, CONFLICT_STATUS_CODE, TRANSACT_WRITE_MAX_ITEMS
 from abstractioutils.providers.aws.sqs import SQS
 from abstractioutils.providers.aws.sns import SNS
 from abstractioutils.providers.aws.ssm import SSM
+from abstractioutils.providers.aws.sqs_batch_sender import SQSBatchSender
 
 from abstractioutils.providers.gcp.cloud_run import CloudRun
-from abstractioutils.providers.gcp.compute_engine import ComputeEngine
+
+from abstractioutils.clients.gcp_provider_pool import GcpProviderPool, GcpProviders
 
 from abstractioutils.exceptions.helpers_exception import HelpersException
+from abstractioutils.exceptions.aws.dynamodb_exception import DynamoDBException
+
+from abstractioutils.utils.poller import Poller, deadline_from_env
+from abstractioutils.utils.ttl_cache import TTLCache
+from abstractioutils.utils.lazy_import import lazy_import
+from abstractioutils.utils.log import get_logger
+
+if TYPE_CHECKING:
+    from abstractioutils.dto.cluster_dto import ClusterDTO
+    from abstractioutils.dto.cluster_update import ClusterUpdate
+
+# pydantic is only imported once a cluster is decoded
+cluster_codec = lazy_import('abstractioutils.dto.cluster_codec')
+cluster_update = lazy_import('abstractioutils.dto.cluster_update')
 
-from abstractioutils.dto.cluster_dto import ClusterDTO
+logger = get_logger(__name__)
+
+# Update expression clause keywords, not when part of a name or placeholder
+UPDATE_CLAUSE = re.compile(r'(?<![#:\w])(SET|REMOVE|ADD|DELETE)\b', re.IGNORECASE)
+# A top-level attribute name or placeholder, not a nested map or list path
+TOP_LEVEL_PATH = re.compile(r'#?\w+')
 
 
 class CommonOperations(object):
-    def __init__(self):
+    def __init__(self, cluster_cache_ttl: float = 0, cluster_cache_size: int = 1024):
         self._dynamodb = DynamoDB()
         self._sqs = SQS()
         self._sns = SNS()
         self._ssm = SSM()
 
+        # Disabled unless a TTL is given, clusters are cached by id
+        self._cluster_cache = TTLCache(ttl=cluster_cache_ttl, max_size=cluster_cache_size)
+
+        self._sqs_batch_senders = dict()
+        self._sqs_batch_senders_lock = threading.Lock()
+
+        # Providers of the last cluster passed to _set_gcp_service_account, concurrent workflows should use
+        # get_gcp_providers instead
         self._cloud_run = None
         self._compute_engine = None
+        self._gcp_providers = GcpProviderPool(ssm=self._ssm)
+
+        self._cloud_run_poller = Poller(
+            deadline=deadline_from_env(
+                timeout_variable='CLOUD_RUN_TIMEOUT',
+                retries_variable='CLOUD_RUN_RETRIES',
+                default=300
+            )
+        )
 
     @staticmethod
-    def _lint_cluster(dynamo_obj: dict) -> ClusterDTO:
-        def lint_env_variables() -> dict:
-            return_value = dict()
-            if dynamo_obj.get('env_variables') is not None:
-                for single_item in dynamo_obj['env_variables']['SS']:
-                    split_item = single_item.split('=')
-                    return_value[split_item[0]] = split_item[1]
-            return return_value
-
-        return ClusterDTO.parse_obj({
-            'id': dynamo_obj['id']['S'],
-            'name': dynamo_obj['id']['S'],
-            'image_url': dynamo_obj['image_url']['S'],
-            'vcpus': dynamo_obj['vcpus']['N'],
-            'memory': dynamo_obj['memory']['N'],
-            'user_id': dynamo_obj['user_id']['S'],
-            'port': dynamo_obj['port']['N'],
-            'has_ip': dynamo_obj['has_ip']['BOOL'],
-            'type': dynamo_obj['type']['S'],
-            'region': dynamo_obj['region']['S'],
-            'status': dynamo_obj['status']['S'],
-            'creation_date': dynamo_obj['creation_date']['S'],
-            'env_variables': lint_env_variables(),
-            'project': dynamo_obj['gcp_project']['S'] if dynamo_obj.get('gcp_project') else None,
-            'endpoint': dynamo_obj['endpoint']['S'] if dynamo_obj.get('endpoint') else None,
-            'ip_address': dynamo_obj['ip_address']['S'] if dynamo_obj.get('ip_address') else None,
-            'error_message': dynamo_obj['error_message']['S'] if dynamo_obj.get('error_message') else None,
-            'username': dynamo_obj['username']['S'] if dynamo_obj.get('username') else None,
-            'password': dynamo_obj['password']['S'] if dynamo_obj.get('password') else None
-        })
+    def _lint_cluster(dynamo_obj: dict, trusted: bool = False) -> ClusterDTO:
+        return cluster_codec.decode(item=dynamo_obj, trusted=trusted)
 
     @staticmethod
     def _lint_environment_variables(env_variables: dict) -> list:
+        # Deprecated, the KEY=VALUE list only fits the legacy string set
+        warnings.warn(
+            '_lint_environment_variables is deprecated, use _encode_environment_variables instead',
+            DeprecationWarning,
+            stacklevel=2
+        )
         return [f"{key}={env_variables[key]}" for key in env_variables.keys()]
 
+    @staticmethod
+    def _encode_environment_variables(env_variables: dict, env_format: str = None) -> dict:
+        # The env_variables attribute of a cluster item, in the format set by CLUSTER_ENV_FORMAT unless given
+        return cluster_codec.encode_env_variables(env_variables=env_variables, env_format=env_format)
+
+    @staticmethod
+    def _probe_cloud_run_service(cloud_run: CloudRun, cloud_run_name: str, region: str, last_status: dict):
+        run_info = cloud_run.get_service(name=cloud_run_name, region=region)
+        last_status.update(run_info['status'])
+        for single_condition in run_info['status'].get('conditions', []):
+            if single_condition['type'] == 'Ready' and single_condition['status'] == 'True':
+                return run_info
+        return None
+
+    def set_cluster_completed(self, cluster_id: str, has_ip: bool, static_ip: str, run_info: dict) -> None:
+        # run_info is the Ready Cloud Run service, its URL becomes the cluster endpoint
+        logger.debug("Updating the cluster status...", extra={'cluster_id': cluster_id})
+        changes = {'endpoint': run_info['status']['url'], 'status': 'COMPLETED'}
+        if has_ip:
+            changes = {'ip_address': static_ip, **changes}
+        self.apply_cluster_update(cluster_id=cluster_id, update=cluster_update.ClusterUpdate(changes=changes))
+
     def _loop_over_cloud_run_service(
         self,
         cluster_id: str,
         cloud_run_name: str,
         region: str,
         has_ip: bool,
-        static_ip: str
+        static_ip: str,
+        cancel_event: threading.Event = None,
+        cloud_run: CloudRun = None
     ) -> bool:
-        print(f"{datetime.now()} - Looping over the Cloud Run service {cloud_run_name}...")
-
-        count = 0
-        run_info = None
-        while count < int(os.environ.get("CLOUD_RUN_RETRIES")):
-            print(f"{datetime.now()} - Attempt number {count}")
-            run_info = self._cloud_run.get_service(name=cloud_run_name, region=region)
-            if 'conditions' in run_info['status']:
-                for single_condition in run_info['status']['conditions']:
-                    if single_condition['type'] == 'Ready' and single_condition['status'] == 'True':
-                        print(f"{datetime.now()} - Updating the cluster status...")
-                        if has_ip:
-                            self.update_cluster_information(
-                                cluster_id=cluster_id,
-                                expression_attribute_names={
-                                    '#ip_address': 'ip_address',
-                                    '#endpoint': 'endpoint',
-                                    '#status': 'status'
-                                },
-                                expression_attribute_values={
-                                    ':ip_address': {
-                                        'S': static_ip
-                                    },
-                                    ':endpoint': {
-                                        'S': run_info['status']['url']
-                                    },
-                                    ':status': {
-                                        'S': 'COMPLETED'
-                                    }
-                                },
-                                update_expression='SET #ip_address = :ip_address, #endpoint = :endpoint, #status = :status'
-                            )
-                        else:
-                            self.update_cluster_information(
-                                cluster_id=cluster_id,
-                                expression_attribute_names={
-                                    '#endpoint': 'endpoint',
-                                    '#status': 'status'
-                                },
-                                expression_attribute_values={
-                                    ':endpoint': {
-                                        'S': run_info['status']['url']
-                                    },
-                                    ':status': {
-                                        'S': 'COMPLETED'
-                                    }
-                                },
-                                update_expression='SET #endpoint = :endpoint, #status = :status'
-                            )
-                        return True
-            count += 1
-            sleep(5)
-
-        print(f"{datetime.now()} - Error while creating the Cloud Run service - {run_info['status']}")
-        return False
+        logger.debug("Looping over the Cloud Run service %s...", cloud_run_name)
+        try:
+            run_info = self.wait_for_cloud_run_service(
+                cloud_run_name=cloud_run_name,
+                region=region,
+                cloud_run=cloud_run,
+                cancel_event=cancel_event
+            )
+        except HelpersException as exc:
+            logger.error(
+                "Error while creating the Cloud Run service - %s",
+                exc.get_message(),
+                extra={'cluster_id': cluster_id, 'service': 'cloud_run', 'region': region}
+            )
+            return False
+
+        self.set_cluster_completed(cluster_id=cluster_id, has_ip=has_ip, static_ip=static_ip, run_info=run_info)
+        return True
+
+    def wait_for_cloud_run_service(
+        self,
+        cloud_run_name: str,
+        region: str,
+        cloud_run: CloudRun = None,
+        cancel_event: threading.Event = None
+    ) -> dict:
+        # The service once Ready, polled with the CLOUD_RUN_TIMEOUT deadline. Raises a 500 with the last reported
+        # status if it is not ready in time. Without cloud_run the provider of the last _set_gcp_service_account is used.
+        last_status = dict()
+        result = self._cloud_run_poller.poll(
+            probe=lambda: self._probe_cloud_run_service(
+                cloud_run=cloud_run if cloud_run is not None else self._cloud_run,
+                cloud_run_name=cloud_run_name,
+                region=region,
+                last_status=last_status
+            ),
+            name=f'Cloud Run service {cloud_run_name}',
+            cancel_event=cancel_event
+        )
+        if not result.ready:
+            raise HelpersException(status_code=500, message=f'Cloud Run service not ready - {last_status}')
+        return result.value
 
     def _set_gcp_service_account(self, cluster: ClusterDTO) -> None:
-        print(f"{datetime.now()} - Setting the service account...")
-        service_account = self._ssm.get_parameter(
-            name=f"/gcp/{cluster.project}/sa"
+        logger.debug("Setting the service account...")
+        providers = self.get_gcp_providers(project=cluster.project)
+
+        self._cloud_run = providers.cloud_run
+        self._compute_engine = providers.compute_engine
+
+    def get_gcp_providers(self, project: str) -> GcpProviders:
+        return self._gcp_providers.get(project=project)
+
+    def warm_gcp_service_accounts(self) -> list:
+        logger.debug("Loading the GCP service accounts...")
+        parameters = self._ssm.get_parameters_by_path(path='/gcp/', recursive=True)
+        return [name for name in parameters.keys() if name.endswith('/sa')]
+
+    def get_cluster_information(self, cluster_id: str, consistent_read: bool = False) -> ClusterDTO:
+        # A consistent read always goes to DynamoDB and refreshes the cached cluster
+        if not consistent_read:
+            cluster = self._cluster_cache.get(cluster_id)
+            if cluster is not None:
+                return cluster
+
+        logger.debug("Getting the cluster %s", cluster_id, extra={'cluster_id': cluster_id})
+        cluster_info = self._dynamodb.get_item(
+            table_name=os.environ.get('TABLE_CLUSTERS'),
+            key={
+                'id': {'S': cluster_id}
+            },
+            consistent_read=consistent_read
         )
 
-        self._cloud_run = CloudRun(service_account_info=service_account)
-        self._compute_engine = ComputeEngine(service_account_info=service_account)
+        if cluster_info.get('Item') is None:
+            logger.debug("No cluster found with the given id")
+            raise HelpersException(status_code=404, message='No cluster found with the given id')
+
+        cluster = self._lint_cluster(dynamo_obj=cluster_info['Item'], trusted=True)
+        self._cluster_cache.set(cluster_id, cluster)
+        return cluster
+
+    def get_cluster_fields(self, cluster_id: str, fields: list, consistent_read: bool = False) -> ClusterDTO:
+        # Reads only the attributes of the given ClusterDTO fields, e.g. ['status', 'endpoint'] while polling.
+        # The other fields of the returned cluster are None. A cached cluster is returned whole.
+        if not consistent_read:
+            cluster = self._cluster_cache.get(cluster_id)
+            if cluster is not None:
+                return cluster
+
+        try:
+            projection_expression, expression_attribute_names = cluster_codec.build_projection(fields=fields)
+        except ValueError as exc:
+            raise HelpersException(status_code=400, message=exc.__str__())
 
-    def get_cluster_information(self, cluster_id: str) -> ClusterDTO:
-        print(f"{datetime.now()} - Getting the cluster {cluster_id}")
+        logger.debug("Getting the fields %s of the cluster %s", fields, cluster_id, extra={'cluster_id': cluster_id})
         cluster_info = self._dynamodb.get_item(
             table_name=os.environ.get('TABLE_CLUSTERS'),
             key={
                 'id': {'S': cluster_id}
-            }
+            },
+            consistent_read=consistent_read,
+            projection_expression=projection_expression,
+            expression_attribute_names=expression_attribute_names
         )
 
         if cluster_info.get('Item') is None:
-            print(f"{datetime.now()} - No cluster found with the given id")
+            logger.debug("No cluster found with the given id")
             raise HelpersException(status_code=404, message='No cluster found with the given id')
-        return self._lint_cluster(dynamo_obj=cluster_info['Item'])
+
+        # A fresher read of some fields still refreshes a cached cluster
+        fields_read = cluster_codec.decode_attributes(cluster_info['Item'])
+        self._cluster_cache.merge(cluster_id, lambda cluster: cluster.copy(update=fields_read))
+        return cluster_codec.decode_partial(item=cluster_info['Item'], trusted=True)
+
+    def get_cluster_cache_stats(self) -> dict:
+        return {
+            'hits': self._cluster_cache.hits,
+            'misses': self._cluster_cache.misses,
+            'size': len(self._cluster_cache)
+        }
+
+    def invalidate_cluster_cache(self, cluster_id: str = None) -> None:
+        self._cluster_cache.invalidate(key=cluster_id)
+
+    @staticmethod
+    def _sets_top_level_paths_only(update_expression: str) -> bool:
+        # Only then UPDATED_NEW holds every updated attribute whole. A REMOVE is not reflected in it,
+        # and a nested path such as #env.#key or #list[0] only returns the updated element, as do ADD and DELETE.
+        parts = UPDATE_CLAUSE.split(update_expression)
+        if parts[0].strip():
+            return False
+        for keyword, clause in zip(parts[1::2], parts[2::2]):
+            if keyword.upper() != 'SET':
+                return False
+            depth, start, assignments = 0, 0, list()
+            for index, character in enumerate(clause):
+                depth += {'(': 1, ')': -1}.get(character, 0)
+                if character == ',' and depth == 0:
+                    assignments.append(clause[start:index])
+                    start = index + 1
+            assignments.append(clause[start:])
+            for assignment in assignments:
+                if not TOP_LEVEL_PATH.fullmatch(assignment.split('=', 1)[0].strip()):
+                    return False
+        return True
+
+    def _merge_cached_cluster(self, cluster_id: str, update_expression: str, attributes: dict) -> None:
+        # Any other update is read again next time
+        if not self._sets_top_level_paths_only(update_expression=update_expression):
+            self._cluster_cache.invalidate(key=cluster_id)
+            return
+
+        fields = cluster_codec.decode_attributes(attributes)
+        self._cluster_cache.merge(cluster_id, lambda cluster: cluster.copy(update=fields))
+
+    def get_clusters_information(self, cluster_ids: list, max_workers: int = None, trusted: bool = True) -> list:
+        # Clusters are returned in the order of the given ids, missing ones are left out.
+        # Items come straight from the clusters table, so they are not validated unless trusted is False.
+        logger.debug("Getting %s clusters", len(cluster_ids))
+        items = self._dynamodb.batch_get_items(
+            table_name=os.environ.get('TABLE_CLUSTERS'),
+            keys=[{'id': {'S': cluster_id}} for cluster_id in dict.fromkeys(cluster_ids)],
+            max_workers=max_workers
+        )
+
+        clusters = {cluster.id: cluster for cluster in cluster_codec.decode_many(items=items, trusted=trusted)}
+        return [clusters[cluster_id] for cluster_id in cluster_ids if cluster_id in clusters]
 
     def update_cluster_information(
         self,
         cluster_id: str,
         expression_attribute_names: dict,
         expression_attribute_values: dict,
-        update_expression: str
+        update_expression: str,
+        condition_expression: str = None
     ) -> dict:
-        return self._dynamodb.update_item(
+        response = self._dynamodb.update_item(
             table_name=os.environ.get('TABLE_CLUSTERS'),
             key={
                 'id': {
@@ -165,29 +302,205 @@ class CommonOperations(object):
             },
             expression_attribute_names=expression_attribute_names,
             expression_attribute_values=expression_attribute_values,
-            update_expression=update_expression
+            update_expression=update_expression,
+            condition_expression=condition_expression
         )
 
+        self._merge_cached_cluster(
+            cluster_id=cluster_id,
+            update_expression=update_expression,
+            attributes=response.get('Attributes', dict())
+        )
+        return response
+
+    def apply_cluster_update(self, cluster_id: str, update: ClusterUpdate) -> dict:
+        # Nothing is written for an empty update. A version conflict raises a DynamoDBException with a 409.
+        if not update:
+            return dict()
+        return self.update_cluster_information(cluster_id=cluster_id, **update.build())
+
+    def apply_cluster_updates(self, updates: dict, max_workers: int = 8) -> dict:
+        # Updates of several clusters by id, applied concurrently. Results are the UpdateItem responses,
+        # or the exception raised for that cluster.
+        updates = {cluster_id: update for cluster_id, update in updates.items() if update}
+        if not updates:
+            return dict()
+
+        def apply(cluster_id: str):
+            try:
+                return self.apply_cluster_update(cluster_id=cluster_id, update=updates[cluster_id])
+            except Exception as exc:
+                logger.error("Error while updating the cluster - %s", exc, extra={'cluster_id': cluster_id})
+                return exc
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(updates))) as executor:
+            return dict(zip(updates.keys(), executor.map(apply, updates.keys())))
+
+    def apply_cluster_updates_transaction(self, updates: dict, client_request_token: str = None) -> None:
+        # Updates of several clusters by id in a single TransactWriteItems call, either all of them apply or none
+        updates = {cluster_id: update for cluster_id, update in updates.items() if update}
+        if not updates:
+            return
+        if len(updates) > TRANSACT_WRITE_MAX_ITEMS:
+            raise HelpersException(
+                status_code=400,
+                message=f'A transaction cannot update more than {TRANSACT_WRITE_MAX_ITEMS} clusters'
+            )
+
+        logger.debug("Updating %s clusters in a transaction", len(updates))
+        self._dynamodb.transact_write_items(
+            items=[
+                update.to_transact_item(table_name=os.environ.get('TABLE_CLUSTERS'), cluster_id=cluster_id)
+                for cluster_id, update in updates.items()
+            ],
+            client_request_token=client_request_token
+        )
+
+        # TransactWriteItems returns no attributes, the cache is merged with the written ones
+        for cluster_id, update in updates.items():
+            self._merge_cached_cluster(
+                cluster_id=cluster_id,
+                update_expression=update.build()['update_expression'],
+                attributes=update.updated_attributes()
+            )
+
+    def _migrate_env_variables(self, item: dict) -> None:
+        # The write only lands if the variables are still the ones read, a concurrent update wins otherwise
+        legacy = item['env_variables']
+        self._dynamodb.update_item(
+            table_name=os.environ.get('TABLE_CLUSTERS'),
+            key={'id': item['id']},
+            expression_attribute_names={'#env': 'env_variables'},
+            expression_attribute_values={
+                ':old': legacy,
+                ':new': cluster_codec.encode_env_variables(env_variables=cluster_codec.decode_env_variables(legacy))
+            },
+            update_expression='SET #env = :new',
+            condition_expression='#env = :old'
+        )
+        self._cluster_cache.invalidate(key=item['id']['S'])
+
+    def migrate_env_variables(self, max_workers: int = 8, scan_segments: int = 1) -> dict:
+        # Rewrites the clusters still holding the legacy KEY=VALUE string set in the current format.
+        # It can run while the table is in use and be run again, migrated clusters are not touched.
+        stats = {'scanned': 0, 'migrated': 0, 'conflicts': 0, 'failed': 0}
+
+        def migrate(item: dict) -> str:
+            try:
+                self._migrate_env_variables(item=item)
+                return 'migrated'
+            except Exception as exc:
+                # A malformed item only fails itself, the migration carries on
+                if isinstance(exc, DynamoDBException) and exc.status_code == CONFLICT_STATUS_CODE:
+                    return 'conflicts'
+                logger.error(
+                    "Error while migrating the env variables of cluster %s - %s",
+                    item.get('id', dict()).get('S'),
+                    exc,
+                    extra={'cluster_id': item.get('id', dict()).get('S')}
+                )
+                return 'failed'
+
+        items = self._dynamodb.iter_scan(
+            table_name=os.environ.get('TABLE_CLUSTERS'),
+            projection_expression='#id, #env',
+            filter_expression='attribute_type(#env, :legacy)',
+            expression_attribute_names={'#id': 'id', '#env': 'env_variables'},
+            expression_attribute_values={':legacy': {'S': 'SS'}},
+            total_segments=scan_segments
+        )
+        # Items are migrated in chunks so the scan is never far ahead of the updates
+        chunk = list()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for single_item in itertools.chain(items, [None]):
+                if single_item is not None:
+                    chunk.append(single_item)
+                    if len(chunk) < max_workers * 4:
+                        continue
+                for outcome in executor.map(migrate, chunk):
+                    stats['scanned'] += 1
+                    stats[outcome] += 1
+                chunk = list()
+
+        logger.info(
+            "Migrated the env variables of %s clusters - conflicts: %s, failed: %s",
+            stats['migrated'],
+            stats['conflicts'],
+            stats['failed'],
+            extra={'operation': 'migrate_env_variables'}
+        )
+        return stats
+
     def send_message_to_sqs(self, message_body: dict, queue_url: str) -> str:
-        print(f"{datetime.now()} - Sending the message to SQS - {queue_url}")
+        logger.debug("Sending the message to SQS - %s", queue_url)
         message_ack = self._sqs.send_message(
             queue_url=queue_url,
             message_body=message_body
         )
 
         if message_ack is None:
-            print(f"{datetime.now()} - Something wrong with SQS send message")
+            logger.error("Something wrong with SQS send message")
             raise HelpersException(status_code=500, message='Something wrong with SQS send message')
         return message_ack
 
+    def send_message_to_sqs_batched(self, message_body: dict, queue_url: str) -> Future:
+        # The returned future resolves to the MessageId once the batch containing the message is sent
+        with self._sqs_batch_senders_lock:
+            if queue_url not in self._sqs_batch_senders:
+                self._sqs_batch_senders[queue_url] = SQSBatchSender(queue_url=queue_url, sqs=self._sqs)
+            sender = self._sqs_batch_senders[queue_url]
+        return sender.send(message_body=message_body)
+
+    def flush_sqs_messages(self) -> None:
+        with self._sqs_batch_senders_lock:
+            senders = list(self._sqs_batch_senders.values())
+        for single_sender in senders:
+            single_sender.flush()
+
     def publish_message_to_sns(self, message_body: dict, topic_arn: str) -> str:
-        print(f"{datetime.now()} - Publishing the failure message to SNS - {topic_arn}")
+        logger.debug("Publishing the failure message to SNS - %s", topic_arn)
         publish_ack = self._sns.publish_message(
             topic_arn=topic_arn,
             message=message_body
         )
 
         if publish_ack is None:
-            print(f"{datetime.now()} - Something wrong with SNS publish message")
+            logger.error("Something wrong with SNS publish message")
             raise HelpersException(status_code=500, message='Something wrong with SNS publish message')
         return publish_ack
+
+    def publish_message_to_sns_topics(
+        self,
+        message_body: dict,
+        topic_arns: list,
+        max_workers: int = 8,
+        raise_on_error: bool = True
+    ) -> dict:
+        # MessageIds by topic. When a topic fails the raised HelpersException carries the MessageIds of the topics
+        # that succeeded in published and the errors by topic in failed, so a retry only targets the failed ones.
+        # Without raise_on_error the errors are returned in place of the MessageIds instead.
+        logger.debug("Publishing the message to %s SNS topics", len(topic_arns))
+        results = self._sns.publish_to_topics(
+            messages_by_topic={topic_arn: [message_body] for topic_arn in topic_arns},
+            max_workers=max_workers
+        )
+
+        published, failed = dict(), dict()
+        for topic_arn, topic_results in results.items():
+            if isinstance(topic_results[0], Exception) or topic_results[0] is None:
+                logger.error("Something wrong with SNS publish message - %s", topic_arn)
+                failed[topic_arn] = topic_results[0] or HelpersException(
+                    status_code=500,
+                    message='Something wrong with SNS publish message'
+                )
+            else:
+                published[topic_arn] = topic_results[0]
+
+        if not failed:
+            return published
+        if not raise_on_error:
+            return {topic_arn: published.get(topic_arn, failed.get(topic_arn)) for topic_arn in results}
+        exception = HelpersException(status_code=500, message='Something wrong with SNS publish message')
+        exception.published = published
+        exception.failed = failed
+        raise exception
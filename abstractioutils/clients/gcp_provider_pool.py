@@ -0,0 +1,111 @@
+import threading
+
+from time import monotonic
+from collections import OrderedDict
+
+from abstractioutils.providers.aws.ssm import SSM
+from abstractioutils.providers.gcp.cloud_run import CloudRun
+from abstractioutils.providers.gcp.compute_engine import ComputeEngine
+from abstractioutils.providers.gcp.credentials import credentials_cache
+
+from abstractioutils.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class GcpProviders(object):
+    def __init__(self, project: str, service_account_info: str):
+        self.project = project
+        self.service_account_info = service_account_info
+        self.cloud_run = CloudRun(service_account_info=service_account_info)
+        self.compute_engine = ComputeEngine(service_account_info=service_account_info)
+        self.checked_at = monotonic()
+        self.last_used = self.checked_at
+
+
+class GcpProviderPool(object):
+    # One CloudRun/ComputeEngine pair per GCP project, built lazily from the /gcp/{project}/sa SSM parameter.
+    # Pairs unused for idle_ttl seconds are evicted, and every rotation_interval seconds the parameter is
+    # read again so that a rotated service account replaces the pair. The pairs are safe to share between threads.
+    def __init__(self, ssm: SSM, idle_ttl: float = 900, rotation_interval: float = 300, max_size: int = 128):
+        self.__ssm = ssm
+        self.__idle_ttl = idle_ttl
+        self.__rotation_interval = rotation_interval
+        self.__max_size = max_size
+        self.__entries = OrderedDict()
+        self.__project_locks = dict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def parameter_name(project: str) -> str:
+        return f"/gcp/{project}/sa"
+
+    def __evict(self, now: float) -> None:
+        # Must be called while holding the lock
+        idle_projects = [
+            project for project, entry in self.__entries.items() if now - entry.last_used > self.__idle_ttl
+        ]
+        for project in idle_projects:
+            del self.__entries[project]
+            self.__project_locks.pop(project, None)
+        while len(self.__entries) > self.__max_size:
+            project, _ = self.__entries.popitem(last=False)
+            self.__project_locks.pop(project, None)
+
+    def __get_fresh(self, project: str, now: float):
+        # Must be called while holding the lock
+        entry = self.__entries.get(project)
+        if entry is None or now - entry.checked_at >= self.__rotation_interval:
+            return None
+        entry.last_used = now
+        self.__entries.move_to_end(project)
+        return entry
+
+    def get(self, project: str) -> GcpProviders:
+        with self.__lock:
+            now = monotonic()
+            self.__evict(now=now)
+            entry = self.__get_fresh(project=project, now=now)
+            if entry is not None:
+                return entry
+            project_lock = self.__project_locks.setdefault(project, threading.Lock())
+
+        # Only one thread per project reads SSM and builds the providers, other projects are not blocked
+        with project_lock:
+            with self.__lock:
+                entry = self.__get_fresh(project=project, now=monotonic())
+                if entry is not None:
+                    return entry
+                entry = self.__entries.get(project)
+
+            # The SSM cache is bypassed when checking for a rotation, otherwise the old secret would come back
+            service_account = self.__ssm.get_parameter(
+                name=self.parameter_name(project=project),
+                use_cache=entry is None
+            )
+            if entry is not None and entry.service_account_info == service_account:
+                entry.checked_at = entry.last_used = monotonic()
+                return entry
+
+            if entry is not None:
+                logger.info("Service account of project %s rotated, rebuilding its providers", project)
+                credentials_cache.invalidate(service_account_info=entry.service_account_info)
+            else:
+                logger.debug("Building the providers of project %s", project)
+            entry = GcpProviders(project=project, service_account_info=service_account)
+
+            with self.__lock:
+                self.__entries[project] = entry
+                self.__entries.move_to_end(project)
+                self.__evict(now=monotonic())
+            return entry
+
+    def invalidate(self, project: str = None) -> None:
+        with self.__lock:
+            if project is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(project, None)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
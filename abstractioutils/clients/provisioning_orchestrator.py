@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from abstractioutils.clients.common_operations import CommonOperations
+from abstractioutils.providers.gcp.cloud_run import CloudRun
+from abstractioutils.providers.gcp.compute_engine import ComputeEngine
+
+from abstractioutils.utils.dag import DagResult, DagRunner, Step
+from abstractioutils.utils.log import get_logger
+
+if TYPE_CHECKING:
+    from abstractioutils.dto.cluster_dto import ClusterDTO
+
+logger = get_logger(__name__)
+
+
+class ProvisioningOrchestrator(object):
+    # Provisions a Cloud Run cluster as a dependency graph: the static IP and Cloud Router chain runs
+    # concurrently with the Cloud Run service creation, and completed steps are undone on failure.
+    def __init__(self, common_operations: CommonOperations = None, max_workers: int = 4):
+        self._common_operations = common_operations if common_operations is not None else CommonOperations()
+        self._max_workers = max_workers
+
+    def _get_providers(self, cluster: ClusterDTO) -> (CloudRun, ComputeEngine):
+        # The project providers from the pool instead of the shared CommonOperations fields,
+        # so clusters can be provisioned concurrently
+        providers = self._common_operations.get_gcp_providers(project=cluster.project)
+        return providers.cloud_run, providers.compute_engine
+
+    def _build_steps(
+        self,
+        cluster: ClusterDTO,
+        service_body: dict,
+        cloud_run: CloudRun,
+        compute_engine: ComputeEngine,
+        static_ip_name: str,
+        router_name: str
+    ) -> list:
+        service_name = f'namespaces/{cluster.project}/services/{cluster.name}'
+        resource_name = f'projects/{cluster.project}/locations/{cluster.region}/services/{cluster.name}'
+
+        def wait_ready(context: dict) -> dict:
+            return self._common_operations.wait_for_cloud_run_service(
+                cloud_run_name=service_name,
+                region=cluster.region,
+                cloud_run=cloud_run
+            )
+
+        def set_completed(context: dict) -> None:
+            self._common_operations.set_cluster_completed(
+                cluster_id=cluster.id,
+                has_ip=cluster.has_ip,
+                static_ip=context['get_static_ip'][0] if cluster.has_ip else None,
+                run_info=context['wait_ready']
+            )
+
+        steps = [
+            Step(
+                name='create_cloud_run_service',
+                action=lambda context: cloud_run.create_cloud_run_service(
+                    project_id=cluster.project,
+                    region=cluster.region,
+                    body=service_body
+                ),
+                undo=lambda context: cloud_run.delete_cloud_run_service(
+                    service_name=service_name,
+                    region=cluster.region
+                )
+            ),
+            Step(
+                name='allow_unauthenticated_invokations',
+                action=lambda context: cloud_run.allow_unauthenticated_invokations(service_name=resource_name),
+                depends_on=('create_cloud_run_service',)
+            ),
+            Step(
+                name='wait_ready',
+                action=wait_ready,
+                depends_on=('allow_unauthenticated_invokations',)
+            )
+        ]
+        completed_dependencies = ('wait_ready',)
+
+        if cluster.has_ip:
+            # Every insert is its own step, apart from the wait on its operation, so a resource whose operation
+            # times out or fails is still undone. The router is undone before the static IP its NAT holds.
+            steps.extend([
+                Step(
+                    name='reserve_static_ip',
+                    action=lambda context: compute_engine.reserve_static_ip_address(
+                        project=cluster.project,
+                        name=static_ip_name,
+                        region=cluster.region
+                    ),
+                    undo=lambda context: compute_engine.delete_static_ip_address(
+                        project=cluster.project,
+                        region=cluster.region,
+                        address=static_ip_name
+                    )
+                ),
+                Step(
+                    name='wait_static_ip',
+                    action=lambda context: compute_engine.wait_for_operation(operation=context['reserve_static_ip']),
+                    depends_on=('reserve_static_ip',)
+                ),
+                Step(
+                    name='get_static_ip',
+                    action=lambda context: compute_engine.get_static_ip_address(
+                        project=cluster.project,
+                        name=static_ip_name,
+                        region=cluster.region
+                    ),
+                    depends_on=('wait_static_ip',)
+                ),
+                Step(
+                    name='create_cloud_router_with_nat',
+                    action=lambda context: compute_engine.create_cloud_router_with_nat(
+                        project=cluster.project,
+                        name=router_name,
+                        region=cluster.region,
+                        static_ip=context['get_static_ip'][1],
+                        subnetwork=cluster.subnetwork
+                    ),
+                    depends_on=('get_static_ip',),
+                    undo=lambda context: compute_engine.wait_for_operation(
+                        operation=compute_engine.delete_cloud_router(
+                            project=cluster.project,
+                            region=cluster.region,
+                            router_name=router_name
+                        )
+                    )
+                ),
+                Step(
+                    name='wait_cloud_router',
+                    action=lambda context: compute_engine.wait_for_operation(
+                        operation=context['create_cloud_router_with_nat']
+                    ),
+                    depends_on=('create_cloud_router_with_nat',)
+                )
+            ])
+            completed_dependencies += ('get_static_ip', 'wait_cloud_router')
+
+        steps.append(Step(name='set_cluster_completed', action=set_completed, depends_on=completed_dependencies))
+        return steps
+
+    def provision_cloud_run_cluster(
+        self,
+        cluster: ClusterDTO,
+        service_body: dict,
+        static_ip_name: str = None,
+        router_name: str = None
+    ) -> DagResult:
+        # The static IP and the Cloud Router are named after the cluster unless given explicitly
+        logger.debug("Provisioning the cluster %s...", cluster.id)
+        cloud_run, compute_engine = self._get_providers(cluster=cluster)
+
+        result = DagRunner(
+            steps=self._build_steps(
+                cluster=cluster,
+                service_body=service_body,
+                cloud_run=cloud_run,
+                compute_engine=compute_engine,
+                static_ip_name=static_ip_name or cluster.name,
+                router_name=router_name or cluster.name
+            ),
+            max_workers=self._max_workers
+        ).run()
+
+        logger.info(
+            "Cluster %s provisioning finished in %.2fs (succeeded: %s) - %s",
+            cluster.id,
+            result.elapsed,
+            result.succeeded,
+            result.timings,
+            extra={'cluster_id': cluster.id, 'operation': 'provision_cloud_run_cluster'}
+        )
+        return result
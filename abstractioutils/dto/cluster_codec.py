@@ -0,0 +1,130 @@
+import os
+import json
+import zlib
+
+from abstractioutils.dto.cluster_dto import ClusterDTO
+
+ENV_FORMAT_MAP = 'map'
+ENV_FORMAT_LEGACY = 'legacy'
+
+
+def decode_env_variables(attribute: dict) -> dict:
+    # Reads a map, compressed JSON and the legacy KEY=VALUE string set alike
+    if 'M' in attribute:
+        return {key: value['S'] for key, value in attribute['M'].items()}
+    if 'B' in attribute:
+        return json.loads(zlib.decompress(attribute['B']).decode('utf-8'))
+    return dict(single_item.split('=', 1) for single_item in attribute['SS'])
+
+
+def encode_legacy_env_variables(env_variables: dict) -> dict:
+    return {'SS': [f"{key}={value}" for key, value in env_variables.items()]}
+
+
+def encode_env_variables(env_variables: dict, env_format: str = None) -> dict:
+    # A map, or zlib-compressed JSON once the serialized variables exceed CLUSTER_ENV_COMPRESSION_THRESHOLD bytes.
+    # The legacy format, given or set with CLUSTER_ENV_FORMAT=legacy, keeps writing the string set while readers
+    # of the old format are still deployed.
+    if env_format is None:
+        env_format = os.environ.get('CLUSTER_ENV_FORMAT', ENV_FORMAT_MAP)
+    if env_format == ENV_FORMAT_LEGACY:
+        return encode_legacy_env_variables(env_variables=env_variables)
+
+    serialized = json.dumps(env_variables, separators=(',', ':')).encode('utf-8')
+    if len(serialized) > int(os.environ.get('CLUSTER_ENV_COMPRESSION_THRESHOLD', 1024)):
+        return {'B': zlib.compress(serialized)}
+    return {'M': {key: {'S': value} for key, value in env_variables.items()}}
+
+
+def is_legacy_env_variables(attribute: dict) -> bool:
+    return 'SS' in attribute
+
+
+# (ClusterDTO field, DynamoDB attribute, decoder, encoder), built once and shared by every codec call
+CLUSTER_ATTRIBUTES = (
+    ('id', 'id', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('name', 'id', lambda attribute: attribute['S'], None),
+    ('image_url', 'image_url', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('vcpus', 'vcpus', lambda attribute: int(attribute['N']), lambda value: {'N': str(value)}),
+    ('memory', 'memory', lambda attribute: int(attribute['N']), lambda value: {'N': str(value)}),
+    ('user_id', 'user_id', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('port', 'port', lambda attribute: int(attribute['N']), lambda value: {'N': str(value)}),
+    ('has_ip', 'has_ip', lambda attribute: attribute['BOOL'], lambda value: {'BOOL': value}),
+    ('type', 'type', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('region', 'region', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('status', 'status', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('creation_date', 'creation_date', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('env_variables', 'env_variables', decode_env_variables, encode_env_variables),
+    ('project', 'gcp_project', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('endpoint', 'endpoint', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('ip_address', 'ip_address', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('error_message', 'error_message', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('username', 'username', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('password', 'password', lambda attribute: attribute['S'], lambda value: {'S': value}),
+    ('version', 'version', lambda attribute: int(attribute['N']), lambda value: {'N': str(value)})
+)
+
+FIELD_TO_ATTRIBUTE = {field: attribute for field, attribute, _, _ in CLUSTER_ATTRIBUTES}
+
+
+def build_projection(fields: list) -> tuple:
+    # (ProjectionExpression, ExpressionAttributeNames) reading only the attributes of the given fields.
+    # The id is always read, so partial clusters can still be told apart.
+    unknown = [field for field in fields if field not in FIELD_TO_ATTRIBUTE]
+    if unknown:
+        raise ValueError(f"Unknown cluster fields: {', '.join(unknown)}")
+
+    attributes = list(dict.fromkeys(['id'] + [FIELD_TO_ATTRIBUTE[field] for field in fields]))
+    return (
+        ', '.join(f'#{attribute}' for attribute in attributes),
+        {f'#{attribute}': attribute for attribute in attributes}
+    )
+
+
+def decode_values(item: dict) -> dict:
+    values = {
+        field: decoder(item[attribute]) if attribute in item else None
+        for field, attribute, decoder, _ in CLUSTER_ATTRIBUTES
+    }
+    if values['env_variables'] is None:
+        values['env_variables'] = dict()
+    return values
+
+
+def decode_attributes(attributes: dict) -> dict:
+    # Only the fields whose attribute is present, e.g. the UPDATED_NEW attributes returned by UpdateItem
+    return {
+        field: decoder(attributes[attribute])
+        for field, attribute, decoder, _ in CLUSTER_ATTRIBUTES
+        if attribute in attributes
+    }
+
+
+def decode(item: dict, trusted: bool = False) -> ClusterDTO:
+    # Trusted items come straight from the clusters table, so pydantic validation can be skipped
+    if trusted:
+        return ClusterDTO.construct(**decode_values(item=item))
+    return ClusterDTO.parse_obj(decode_values(item=item))
+
+
+def decode_many(items: list, trusted: bool = False) -> list:
+    if trusted:
+        return [ClusterDTO.construct(**decode_values(item=item)) for item in items]
+    return [ClusterDTO.parse_obj(decode_values(item=item)) for item in items]
+
+
+def decode_partial(item: dict, trusted: bool = False) -> ClusterDTO:
+    # Only the fields whose attribute was read are set, the others stay None and out of __fields_set__
+    if trusted:
+        return ClusterDTO.construct(**decode_attributes(attributes=item))
+    return ClusterDTO.parse_obj(decode_attributes(attributes=item))
+
+
+def encode(cluster: ClusterDTO) -> dict:
+    # Fields without a value are left out, DynamoDB does not store empty sets
+    item = dict()
+    for field, attribute, _, encoder in CLUSTER_ATTRIBUTES:
+        value = getattr(cluster, field)
+        if encoder is not None and value is not None and value != dict():
+            item[attribute] = encoder(value)
+    return item
@@ -24,3 +24,4 @@ class ClusterDTO(BaseModel):
     error_message: Optional[str]
     username: Optional[str]
     password: Optional[str]
+    version: Optional[int]
@@ -0,0 +1,117 @@
+from abstractioutils.dto.cluster_dto import ClusterDTO
+from abstractioutils.dto.cluster_codec import CLUSTER_ATTRIBUTES
+
+VERSION_ATTRIBUTE = 'version'
+
+# (DynamoDB attribute, encoder) of the fields that can be written. The id is the key of the record and the
+# version is only written by versioned updates.
+UPDATABLE_FIELDS = {
+    field: (attribute, encoder)
+    for field, attribute, _, encoder in CLUSTER_ATTRIBUTES
+    if encoder is not None and attribute not in ('id', VERSION_ATTRIBUTE)
+}
+
+
+class ClusterUpdate(object):
+    # Smallest SET/REMOVE update of a cluster record, a None or empty value removes the attribute.
+    # With expected_version the update only applies while the record is still at that version (None for a record
+    # never written by a versioned update) and moves it to the next one. Only versioned writers are detected.
+    def __init__(self, changes: dict = None, expected_version: int = None, versioned: bool = None):
+        self.__changes = dict()
+        self.expected_version = expected_version
+        self.versioned = versioned if versioned is not None else expected_version is not None
+        for field, value in (changes or dict()).items():
+            self.set(field=field, value=value)
+
+    @classmethod
+    def from_diff(cls, old: ClusterDTO, new: ClusterDTO, versioned: bool = False) -> 'ClusterUpdate':
+        # Only the fields set on new are compared, so a partial cluster never removes the fields it did not read
+        update = cls(expected_version=old.version if versioned else None, versioned=versioned)
+        for field in UPDATABLE_FIELDS:
+            if field in new.__fields_set__ and getattr(new, field) != getattr(old, field):
+                update.set(field=field, value=getattr(new, field))
+        return update
+
+    def set(self, field: str, value) -> 'ClusterUpdate':
+        if field not in UPDATABLE_FIELDS:
+            raise ValueError(f"The cluster field {field} cannot be updated")
+        self.__changes[field] = value
+        return self
+
+    def remove(self, field: str) -> 'ClusterUpdate':
+        return self.set(field=field, value=None)
+
+    @staticmethod
+    def __is_removal(value) -> bool:
+        # DynamoDB does not store empty sets, an empty dict is removed like None
+        return value is None or value == dict()
+
+    @property
+    def changes(self) -> dict:
+        return dict(self.__changes)
+
+    def __bool__(self) -> bool:
+        return bool(self.__changes)
+
+    def __next_version(self) -> int:
+        return (self.expected_version or 0) + 1
+
+    def updated_attributes(self) -> dict:
+        # The attributes written by SET, shaped like the UPDATED_NEW attributes returned by UpdateItem
+        attributes = {
+            UPDATABLE_FIELDS[field][0]: UPDATABLE_FIELDS[field][1](value)
+            for field, value in self.__changes.items()
+            if not self.__is_removal(value)
+        }
+        if self.versioned:
+            attributes[VERSION_ATTRIBUTE] = {'N': str(self.__next_version())}
+        return attributes
+
+    def build(self) -> dict:
+        # Keyword arguments of CommonOperations.update_cluster_information
+        names, values = dict(), dict()
+        assignments, removals = list(), list()
+        for field, value in self.__changes.items():
+            attribute, encoder = UPDATABLE_FIELDS[field]
+            names[f'#{attribute}'] = attribute
+            if self.__is_removal(value):
+                removals.append(f'#{attribute}')
+            else:
+                values[f':{attribute}'] = encoder(value)
+                assignments.append(f'#{attribute} = :{attribute}')
+
+        condition_expression = None
+        if self.versioned:
+            names[f'#{VERSION_ATTRIBUTE}'] = VERSION_ATTRIBUTE
+            values[f':{VERSION_ATTRIBUTE}'] = {'N': str(self.__next_version())}
+            assignments.append(f'#{VERSION_ATTRIBUTE} = :{VERSION_ATTRIBUTE}')
+            if self.expected_version is None:
+                condition_expression = f'attribute_not_exists(#{VERSION_ATTRIBUTE})'
+            else:
+                values[':expected_version'] = {'N': str(self.expected_version)}
+                condition_expression = f'#{VERSION_ATTRIBUTE} = :expected_version'
+
+        clauses = list()
+        if assignments:
+            clauses.append(f"SET {', '.join(assignments)}")
+        if removals:
+            clauses.append(f"REMOVE {', '.join(removals)}")
+        return {
+            'expression_attribute_names': names,
+            'expression_attribute_values': values or None,
+            'update_expression': ' '.join(clauses),
+            'condition_expression': condition_expression
+        }
+
+    def to_transact_item(self, table_name: str, cluster_id: str) -> dict:
+        # Update entry of a TransactWriteItems call
+        request = self.build()
+        update = {
+            'TableName': table_name,
+            'Key': {'id': {'S': cluster_id}},
+            'UpdateExpression': request['update_expression'],
+            'ExpressionAttributeNames': request['expression_attribute_names'],
+            'ExpressionAttributeValues': request['expression_attribute_values'],
+            'ConditionExpression': request['condition_expression']
+        }
+        return {'Update': {key: value for key, value in update.items() if value is not None}}
@@ -1,10 +1,22 @@
 import abc
-import boto3
+
+from abstractioutils.providers.aws.client_registry import client_registry
+from abstractioutils.utils.rate_limiter import AdaptiveRateLimiter, rate_limiters
 
 
 class Base(metaclass=abc.ABCMeta):
-    def __init__(self, service: str):
-        self.__client = boto3.client(service)
+    def __init__(self, service: str, region: str = None):
+        self.__service = service
+        self.__region = region
+
+    def _get_region(self) -> str:
+        # The region the client resolved, from the environment or the config when none was given
+        return self.__region if self.__region is not None else self._get_client().meta.region_name
 
     def _get_client(self):
-        return self.__client
+        # The client is created on first use and shared by every provider of the same service and region
+        return client_registry.get_client(service=self.__service, region=self.__region)
+
+    def _get_rate_limiter(self) -> AdaptiveRateLimiter:
+        # The limiter shared by every client of the same service and region
+        return rate_limiters.get(service=self.__service, endpoint=self._get_client().meta.region_name)
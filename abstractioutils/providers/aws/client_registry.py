@@ -0,0 +1,74 @@
+import os
+import threading
+
+from abstractioutils.utils.lazy_import import lazy_import
+from abstractioutils.utils.rate_limiter import rate_limiters
+from abstractioutils.utils.retry import THROTTLING_ERROR_CODES
+
+boto3 = lazy_import('boto3')
+botocore_config = lazy_import('botocore.config')
+
+
+def default_config():
+    return botocore_config.Config(
+        max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 50)),
+        connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', 5)),
+        read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', 30)),
+        retries={
+            'mode': os.environ.get('AWS_RETRY_MODE', 'standard'),
+            'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', 5))
+        }
+    )
+
+
+def _is_throttled(response) -> bool:
+    return response is not None and response[1].get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+class ClientRegistry(object):
+    # Process-wide boto3 clients, created lazily once per service and region on a private session.
+    # boto3 clients are thread-safe once built, sessions are not, so creation happens under a lock.
+    def __init__(self, config=None):
+        self.__config = config
+        self.__session = None
+        self.__clients = dict()
+        self.__lock = threading.Lock()
+
+    def configure(self, config) -> None:
+        # Only clients created afterwards use the new config
+        with self.__lock:
+            self.__config = config
+            self.__clients.clear()
+
+    @staticmethod
+    def __attach_rate_limiter(client, service: str, region: str) -> None:
+        # Every attempt, botocore retries included, waits for a token of the endpoint limiter,
+        # and throttled responses slow the endpoint down. botocore keeps doing the backoff.
+        def acquire(**kwargs) -> None:
+            rate_limiters.get(service=service, endpoint=region).acquire()
+
+        def check_response(response=None, **kwargs) -> None:
+            if _is_throttled(response=response):
+                rate_limiters.get(service=service, endpoint=region).on_throttle()
+
+        client.meta.events.register('before-send', acquire)
+        client.meta.events.register('needs-retry', check_response)
+
+    def get_client(self, service: str, region: str = None):
+        key = (service, region)
+        client = self.__clients.get(key)
+        if client is None:
+            with self.__lock:
+                client = self.__clients.get(key)
+                if client is None:
+                    if self.__session is None:
+                        self.__session = boto3.session.Session()
+                    if self.__config is None:
+                        self.__config = default_config()
+                    client = self.__session.client(service, region_name=region, config=self.__config)
+                    self.__attach_rate_limiter(client=client, service=service, region=client.meta.region_name)
+                    self.__clients[key] = client
+        return client
+
+
+client_registry = ClientRegistry()
@@ -1,26 +1,95 @@
-from datetime import datetime
+import queue
+import random
+import threading
+
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor
 
 from abstractioutils.providers.aws.base import Base
+from abstractioutils.utils.metrics import instrumented, record_retry, timed_call
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.retry import THROTTLED_STATUS_CODE, error_status_code
 from abstractioutils.exceptions.aws.dynamodb_exception import DynamoDBException
 
+logger = get_logger(__name__)
+
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+TRANSACT_WRITE_MAX_ITEMS = 100
+
+CONFLICT_STATUS_CODE = 409
+
 
+@instrumented('dynamodb')
 class DynamoDB(Base):
-    def __init__(self):
-        super().__init__('dynamodb')
+    def __init__(self, region: str = None):
+        super().__init__('dynamodb', region)
+
+    @staticmethod
+    def _backoff(attempt: int) -> None:
+        sleep(min(0.05 * (2 ** attempt), 2) * random.random())
+
+    @staticmethod
+    def _map_chunks(function, chunks: list, max_workers: int) -> list:
+        if max_workers is None or max_workers <= 1 or len(chunks) <= 1:
+            return [function(single_chunk) for single_chunk in chunks]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            return list(executor.map(function, chunks))
+
+    @staticmethod
+    def _conditional_status_code(exc: Exception) -> int:
+        # A failed condition means a concurrent writer got there first, it is reported as a conflict
+        response = getattr(exc, 'response', None)
+        if not isinstance(response, dict):
+            return error_status_code(exc)
+        code = response.get('Error', {}).get('Code')
+        if code == 'ConditionalCheckFailedException':
+            return CONFLICT_STATUS_CODE
+        if code == 'TransactionCanceledException' and any(
+            reason.get('Code') == 'ConditionalCheckFailed' for reason in response.get('CancellationReasons', [])
+        ):
+            return CONFLICT_STATUS_CODE
+        return error_status_code(exc)
+
+    @staticmethod
+    def _build_request(**kwargs) -> dict:
+        return {key: value for key, value in kwargs.items() if value is not None}
+
+    def _iter_pages(self, operation: str, request: dict, stop_event: threading.Event = None):
+        request = dict(request)
+        while stop_event is None or not stop_event.is_set():
+            # Every page is a call of its own, iter_query and iter_scan are generators and not instrumented
+            with timed_call(service='dynamodb', operation=operation, instance=self):
+                try:
+                    page = getattr(self._get_client(), operation)(**request)
+                except Exception as exc:
+                    logger.error("Error while paginating the DynamoDB table with %s - %s", operation, exc)
+                    raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
+
+            yield page
+            if 'LastEvaluatedKey' not in page:
+                return
+            request['ExclusiveStartKey'] = page['LastEvaluatedKey']
 
     def get_item(
         self,
         table_name: str,
-        key: dict
+        key: dict,
+        consistent_read: bool = False,
+        projection_expression: str = None,
+        expression_attribute_names: dict = None
     ) -> dict:
         try:
-            return self._get_client().get_item(
+            return self._get_client().get_item(**self._build_request(
                 TableName=table_name,
-                Key=key
-            )
+                Key=key,
+                ConsistentRead=consistent_read,
+                ProjectionExpression=projection_expression,
+                ExpressionAttributeNames=expression_attribute_names
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while getting item from the DynamoDB table - {exc}")
-            raise DynamoDBException(status_code=500, message=exc.__str__())
+            logger.error("Error while getting item from the DynamoDB table - %s", exc)
+            raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
 
     def delete_item(
         self,
@@ -34,41 +103,54 @@ class DynamoDB(Base):
                 ReturnValues='ALL_OLD'
             )
         except Exception as exc:
-            print(f"{datetime.now()} - Error while deleting item from the DynamoDB table - {exc}")
-            raise DynamoDBException(status_code=500, message=exc.__str__())
+            logger.error("Error while deleting item from the DynamoDB table - %s", exc)
+            raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
 
     def scan(
         self,
         table_name: str,
-        attributes_to_get: list
+        attributes_to_get: list = None,
+        projection_expression: str = None,
+        expression_attribute_names: dict = None,
+        consistent_read: bool = None
     ) -> dict:
+        # attributes_to_get is the legacy parameter, it cannot be combined with a projection expression
         try:
-            return self._get_client().scan(
+            return self._get_client().scan(**self._build_request(
                 TableName=table_name,
                 AttributesToGet=attributes_to_get,
-                Select='SPECIFIC_ATTRIBUTES'
-            )
+                ProjectionExpression=projection_expression,
+                ExpressionAttributeNames=expression_attribute_names,
+                ConsistentRead=consistent_read,
+                Select='SPECIFIC_ATTRIBUTES' if attributes_to_get or projection_expression else None
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while scanning items from the DynamoDB table - {exc}")
-            raise DynamoDBException(status_code=500, message=exc.__str__())
+            logger.error("Error while scanning items from the DynamoDB table - %s", exc)
+            raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
 
     def query(
         self,
         table_name: str,
         index_name: str,
         key_condition_expression: str,
-        expression_attribute_values: dict
+        expression_attribute_values: dict,
+        projection_expression: str = None,
+        expression_attribute_names: dict = None,
+        consistent_read: bool = None
     ) -> dict:
         try:
-            return self._get_client().query(
+            return self._get_client().query(**self._build_request(
                 TableName=table_name,
                 IndexName=index_name,
                 KeyConditionExpression=key_condition_expression,
-                ExpressionAttributeValues=expression_attribute_values
-            )
+                ExpressionAttributeValues=expression_attribute_values,
+                ProjectionExpression=projection_expression,
+                ExpressionAttributeNames=expression_attribute_names,
+                ConsistentRead=consistent_read
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while querying the DynamoDB table - {exc}")
-            raise DynamoDBException(status_code=500, message=exc.__str__())
+            logger.error("Error while querying the DynamoDB table - %s", exc)
+            raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
 
     def put_item(
         self,
@@ -81,8 +163,8 @@ class DynamoDB(Base):
                 Item=new_item
             )
         except Exception as exc:
-            print(f"{datetime.now()} - Error while creating a new DynamoDB item - {exc}")
-            raise DynamoDBException(status_code=500, message=exc.__str__())
+            logger.error("Error while creating a new DynamoDB item - %s", exc)
+            raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
 
     def update_item(
         self,
@@ -90,20 +172,33 @@ class DynamoDB(Base):
         key: dict,
         expression_attribute_names: dict,
         expression_attribute_values: dict,
-        update_expression: str
+        update_expression: str,
+        condition_expression: str = None
     ) -> dict:
         try:
-            return self._get_client().update_item(
+            return self._get_client().update_item(**self._build_request(
                 TableName=table_name,
                 Key=key,
                 ExpressionAttributeNames=expression_attribute_names,
                 ExpressionAttributeValues=expression_attribute_values,
                 UpdateExpression=update_expression,
+                ConditionExpression=condition_expression,
                 ReturnValues='UPDATED_NEW'
-            )
+            ))
+        except Exception as exc:
+            logger.error("Error while updating a DynamoDB item - %s", exc)
+            raise DynamoDBException(status_code=self._conditional_status_code(exc), message=exc.__str__())
+
+    def transact_write_items(self, items: list, client_request_token: str = None) -> dict:
+        # All or nothing, up to TRANSACT_WRITE_MAX_ITEMS items. The token makes retries of the same call idempotent.
+        try:
+            return self._get_client().transact_write_items(**self._build_request(
+                TransactItems=items,
+                ClientRequestToken=client_request_token
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while updating a DynamoDB item - {exc}")
-            raise DynamoDBException(status_code=500, message=exc.__str__())
+            logger.error("Error while writing a DynamoDB transaction - %s", exc)
+            raise DynamoDBException(status_code=self._conditional_status_code(exc), message=exc.__str__())
 
     def delete_attribute(
         self,
@@ -120,5 +215,164 @@ class DynamoDB(Base):
                 UpdateExpression=update_expression
             )
         except Exception as exc:
-            print(f"{datetime.now()} - Error while deleting attribute from a DynamoDB item - {exc}")
-            raise DynamoDBException(status_code=500, message=exc.__str__())
+            logger.error("Error while deleting attribute from a DynamoDB item - %s", exc)
+            raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
+
+    def batch_get_items(
+        self,
+        table_name: str,
+        keys: list,
+        max_workers: int = None,
+        max_attempts: int = 8
+    ) -> list:
+        # Items are returned in no particular order, keys that do not exist are left out
+        def get_chunk(chunk: list) -> list:
+            return_value = list()
+            request_items = {table_name: {'Keys': chunk}}
+            for attempt in range(max_attempts):
+                try:
+                    response = self._get_client().batch_get_item(RequestItems=request_items)
+                except Exception as exc:
+                    logger.error("Error while batch getting items from the DynamoDB table - %s", exc)
+                    raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
+
+                return_value.extend(response.get('Responses', dict()).get(table_name, []))
+                request_items = response.get('UnprocessedKeys')
+                if not request_items:
+                    return return_value
+                # Unprocessed entries mean the table is throttling
+                self._get_rate_limiter().on_throttle()
+                record_retry(service='dynamodb', operation='batch_get_items', region=self._get_region())
+                self._backoff(attempt=attempt)
+
+            logger.warning("Unprocessed keys left after %s attempts", max_attempts)
+            raise DynamoDBException(
+                status_code=THROTTLED_STATUS_CODE,
+                message='Unprocessed keys left while batch getting items'
+            )
+
+        chunks = [keys[index:index + BATCH_GET_MAX_KEYS] for index in range(0, len(keys), BATCH_GET_MAX_KEYS)]
+        return [item for single_chunk in self._map_chunks(get_chunk, chunks, max_workers) for item in single_chunk]
+
+    def batch_write_items(
+        self,
+        table_name: str,
+        put_items: list = None,
+        delete_keys: list = None,
+        max_workers: int = None,
+        max_attempts: int = 8
+    ) -> None:
+        requests = [{'PutRequest': {'Item': item}} for item in put_items or []]
+        requests.extend({'DeleteRequest': {'Key': key}} for key in delete_keys or [])
+
+        def write_chunk(chunk: list) -> None:
+            request_items = {table_name: chunk}
+            for attempt in range(max_attempts):
+                try:
+                    response = self._get_client().batch_write_item(RequestItems=request_items)
+                except Exception as exc:
+                    logger.error("Error while batch writing items to the DynamoDB table - %s", exc)
+                    raise DynamoDBException(status_code=error_status_code(exc), message=exc.__str__())
+
+                request_items = response.get('UnprocessedItems')
+                if not request_items:
+                    return
+                # Unprocessed entries mean the table is throttling
+                self._get_rate_limiter().on_throttle()
+                record_retry(service='dynamodb', operation='batch_write_items', region=self._get_region())
+                self._backoff(attempt=attempt)
+
+            logger.warning("Unprocessed items left after %s attempts", max_attempts)
+            raise DynamoDBException(
+                status_code=THROTTLED_STATUS_CODE,
+                message='Unprocessed items left while batch writing items'
+            )
+
+        chunks = [
+            requests[index:index + BATCH_WRITE_MAX_ITEMS] for index in range(0, len(requests), BATCH_WRITE_MAX_ITEMS)
+        ]
+        self._map_chunks(write_chunk, chunks, max_workers)
+
+    def iter_query(
+        self,
+        table_name: str,
+        key_condition_expression: str,
+        expression_attribute_values: dict,
+        index_name: str = None,
+        expression_attribute_names: dict = None,
+        projection_expression: str = None,
+        filter_expression: str = None,
+        limit: int = None
+    ):
+        # Lazily follows LastEvaluatedKey, limit is the page size of every Query call
+        request = self._build_request(
+            TableName=table_name,
+            IndexName=index_name,
+            KeyConditionExpression=key_condition_expression,
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues=expression_attribute_values,
+            ProjectionExpression=projection_expression,
+            FilterExpression=filter_expression,
+            Limit=limit
+        )
+        for page in self._iter_pages(operation='query', request=request):
+            yield from page.get('Items', [])
+
+    def iter_scan(
+        self,
+        table_name: str,
+        projection_expression: str = None,
+        filter_expression: str = None,
+        expression_attribute_names: dict = None,
+        expression_attribute_values: dict = None,
+        limit: int = None,
+        total_segments: int = 1
+    ):
+        # Lazily follows LastEvaluatedKey, limit is the page size of every Scan call.
+        # With total_segments > 1 the segments are scanned in parallel and items are yielded as they arrive.
+        request = self._build_request(
+            TableName=table_name,
+            ProjectionExpression=projection_expression,
+            FilterExpression=filter_expression,
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues=expression_attribute_values,
+            Limit=limit
+        )
+        if total_segments <= 1:
+            for page in self._iter_pages(operation='scan', request=request):
+                yield from page.get('Items', [])
+            return
+
+        pages = queue.Queue(maxsize=total_segments * 2)
+        stop_event = threading.Event()
+
+        def scan_segment(segment: int) -> None:
+            try:
+                segment_request = dict(request, Segment=segment, TotalSegments=total_segments)
+                for page in self._iter_pages(operation='scan', request=segment_request, stop_event=stop_event):
+                    pages.put(page.get('Items', []))
+            except Exception as exc:
+                pages.put(exc)
+            finally:
+                pages.put(None)
+
+        with ThreadPoolExecutor(max_workers=total_segments) as executor:
+            for segment in range(total_segments):
+                executor.submit(scan_segment, segment)
+
+            try:
+                running_segments = total_segments
+                while running_segments > 0:
+                    items = pages.get()
+                    if items is None:
+                        running_segments -= 1
+                    elif isinstance(items, Exception):
+                        raise items
+                    else:
+                        yield from items
+            finally:
+                # Unblock the workers still waiting on a full queue when the consumer stops early
+                stop_event.set()
+                while running_segments > 0:
+                    if pages.get() is None:
+                        running_segments -= 1
@@ -1,14 +1,24 @@
 import json
 
-from datetime import datetime
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor
 
 from abstractioutils.providers.aws.base import Base
+from abstractioutils.utils.metrics import instrumented, uninstrumented, record_retry
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.retry import THROTTLED_STATUS_CODE, RetryPolicy, entry_status_code, error_status_code
 from abstractioutils.exceptions.aws.sns_exception import SNSException
 
+logger = get_logger(__name__)
 
+PUBLISH_BATCH_MAX_ENTRIES = 10
+
+
+@instrumented('sns')
 class SNS(Base):
-    def __init__(self):
-        super().__init__('sns')
+    def __init__(self, region: str = None):
+        super().__init__('sns', region)
+        self.__retry_policy = RetryPolicy()
 
     def publish_message(self, topic_arn: str, message: dict) -> str:
         try:
@@ -19,5 +29,74 @@ class SNS(Base):
 
             return message_ack.get('MessageId')
         except Exception as exc:
-            print(f"{datetime.now()} - Error while publishing message to SNS - {exc}")
-            raise SNSException(status_code=500, message=exc.__str__())
+            logger.error("Error while publishing message to SNS - %s", exc)
+            raise SNSException(status_code=error_status_code(exc), message=exc.__str__())
+
+    def publish_message_batch(self, topic_arn: str, messages: list) -> list:
+        # Returns one entry per message in input order, either its MessageId or the SNSException that made it fail
+        return_value = list()
+        for index in range(0, len(messages), PUBLISH_BATCH_MAX_ENTRIES):
+            return_value.extend(self._publish_chunk(
+                topic_arn=topic_arn,
+                chunk=messages[index:index + PUBLISH_BATCH_MAX_ENTRIES]
+            ))
+        return return_value
+
+    def _publish_chunk(self, topic_arn: str, chunk: list) -> list:
+        # Throttled entries are published again with the backoff of the retry policy until the attempts run out,
+        # then they fail with a 429
+        results = dict()
+        pending = {str(entry_id): message for entry_id, message in enumerate(chunk)}
+        for attempt in range(self.__retry_policy.max_attempts):
+            try:
+                response = self._get_client().publish_batch(
+                    TopicArn=topic_arn,
+                    PublishBatchRequestEntries=[
+                        {'Id': entry_id, 'Message': json.dumps(message)} for entry_id, message in pending.items()
+                    ]
+                )
+            except Exception as exc:
+                logger.error("Error while publishing message batch to SNS - %s", exc)
+                for entry_id in pending:
+                    results[entry_id] = SNSException(status_code=error_status_code(exc), message=exc.__str__())
+                break
+
+            for single_success in response.get('Successful', []):
+                results[single_success['Id']] = single_success.get('MessageId')
+            throttled = dict()
+            for single_failure in response.get('Failed', []):
+                status_code = entry_status_code(
+                    code=single_failure['Code'],
+                    sender_fault=single_failure.get('SenderFault', False)
+                )
+                if status_code == THROTTLED_STATUS_CODE and single_failure['Id'] in pending:
+                    throttled[single_failure['Id']] = pending[single_failure['Id']]
+                else:
+                    logger.error("Error while publishing message to SNS - %s", single_failure['Code'])
+                results[single_failure['Id']] = SNSException(
+                    status_code=status_code,
+                    message=single_failure.get('Message', single_failure['Code'])
+                )
+
+            pending = throttled
+            if not pending or attempt == self.__retry_policy.max_attempts - 1:
+                break
+            self._get_rate_limiter().on_throttle()
+            record_retry(service='sns', operation='publish_message_batch', region=self._get_region())
+            sleep(self.__retry_policy.delay(attempt=attempt))
+
+        if pending:
+            logger.warning("%s SNS messages still throttled after %s attempts", len(pending), attempt + 1)
+        return [results.get(str(entry_id)) for entry_id in range(len(chunk))]
+
+    @uninstrumented
+    def publish_to_topics(self, messages_by_topic: dict, max_workers: int = 8) -> dict:
+        # Publishes the messages of every topic concurrently, results are shaped like publish_message_batch
+        if not messages_by_topic:
+            return dict()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(messages_by_topic))) as executor:
+            futures = {
+                topic_arn: executor.submit(self.publish_message_batch, topic_arn, messages)
+                for topic_arn, messages in messages_by_topic.items()
+            }
+            return {topic_arn: future.result() for topic_arn, future in futures.items()}
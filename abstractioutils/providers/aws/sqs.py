@@ -1,14 +1,18 @@
 import json
 
-from datetime import datetime
-
 from abstractioutils.providers.aws.base import Base
+from abstractioutils.utils.metrics import instrumented
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.retry import error_status_code
 from abstractioutils.exceptions.aws.sqs_exception import SQSException
 
+logger = get_logger(__name__)
+
 
+@instrumented('sqs')
 class SQS(Base):
-    def __init__(self):
-        super().__init__('sqs')
+    def __init__(self, region: str = None):
+        super().__init__('sqs', region)
 
     def send_message(self, queue_url: str, message_body: dict) -> str:
         try:
@@ -19,5 +23,15 @@ class SQS(Base):
 
             return message_ack.get('MessageId')
         except Exception as exc:
-            print(f"{datetime.now()} - Error while sending message to SQS - {exc}")
-            raise SQSException(status_code=500, message=exc.__str__())
+            logger.error("Error while sending message to SQS - %s", exc)
+            raise SQSException(status_code=error_status_code(exc), message=exc.__str__())
+
+    def send_message_batch(self, queue_url: str, entries: list) -> dict:
+        try:
+            return self._get_client().send_message_batch(
+                QueueUrl=queue_url,
+                Entries=entries
+            )
+        except Exception as exc:
+            logger.error("Error while sending message batch to SQS - %s", exc)
+            raise SQSException(status_code=error_status_code(exc), message=exc.__str__())
@@ -0,0 +1,181 @@
+import json
+import atexit
+import threading
+
+from time import monotonic, sleep
+from concurrent.futures import Future
+
+from abstractioutils.providers.aws.sqs import SQS
+from abstractioutils.utils.metrics import record_retry
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.retry import THROTTLED_STATUS_CODE, RetryPolicy, entry_status_code
+from abstractioutils.exceptions.aws.sqs_exception import SQSException
+
+logger = get_logger(__name__)
+
+BATCH_MAX_ENTRIES = 10
+BATCH_MAX_BYTES = 256 * 1024
+
+
+class SQSBatchSender(object):
+    # Buffers messages for one queue and sends them with SendMessageBatch from a background thread.
+    # A batch is flushed as soon as it is full or max_latency seconds after its first message was queued.
+    # The buffer is drained by close(), which also runs at interpreter exit.
+    def __init__(self, queue_url: str, sqs: SQS = None, max_latency: float = 0.05, max_attempts: int = 3):
+        self._queue_url = queue_url
+        self._sqs = sqs if sqs is not None else SQS()
+        self._max_latency = max_latency
+        self._retry_policy = RetryPolicy(max_attempts=max_attempts, base_delay=0.05, max_delay=1)
+
+        self._pending = list()
+        self._pending_since = None
+        # Batches taken from the buffer but not sent yet, flush() waits for them
+        self._in_flight = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='sqs-batch-sender', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def send(self, message_body: dict) -> Future:
+        # The future resolves to the MessageId, or raises SQSException if the message could not be sent
+        future = Future()
+        body = json.dumps(message_body)
+        size = len(body.encode('utf-8'))
+        if size > BATCH_MAX_BYTES:
+            future.set_exception(SQSException(status_code=400, message='Message exceeds the SQS size limit'))
+            return future
+
+        with self._condition:
+            if self._closed:
+                raise SQSException(status_code=500, message='The SQS batch sender is closed')
+            if not self._pending:
+                self._pending_since = monotonic()
+            self._pending.append((body, size, future))
+            self._condition.notify_all()
+        return future
+
+    def flush(self) -> None:
+        # Returns once every message sent before the call has its outcome, including the batches being sent
+        with self._condition:
+            batches = self._take_batches(flush_all=True)
+        self._send_batches(batches=batches)
+        with self._condition:
+            while self._in_flight:
+                self._condition.wait()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _is_full(self) -> bool:
+        return (
+            len(self._pending) >= BATCH_MAX_ENTRIES or
+            sum(single_entry[1] for single_entry in self._pending[:BATCH_MAX_ENTRIES]) >= BATCH_MAX_BYTES
+        )
+
+    def _take_batches(self, flush_all: bool) -> list:
+        # Must be called while holding the condition
+        batches = list()
+        while self._pending and (flush_all or self._is_full() or not batches):
+            batch, batch_bytes = list(), 0
+            while (
+                self._pending and
+                len(batch) < BATCH_MAX_ENTRIES and
+                batch_bytes + self._pending[0][1] <= BATCH_MAX_BYTES
+            ):
+                batch_bytes += self._pending[0][1]
+                batch.append(self._pending.pop(0))
+            batches.append(batch)
+        self._pending_since = monotonic() if self._pending else None
+        self._in_flight += len(batches)
+        return batches
+
+    def _send_batches(self, batches: list) -> None:
+        for single_batch in batches:
+            try:
+                self._send_batch(batch=single_batch)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and not self._pending:
+                    self._condition.wait()
+                while not self._closed and self._pending and not self._is_full():
+                    remaining = self._pending_since + self._max_latency - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+                if not self._pending:
+                    # A flush from another thread emptied the buffer while waiting
+                    continue
+                batches = self._take_batches(flush_all=False)
+
+            self._send_batches(batches=batches)
+
+    def _send_batch(self, batch: list) -> None:
+        # Never raises, so the background thread keeps running: an unexpected error fails the whole batch
+        try:
+            self._try_send_batch(batch=batch)
+        except Exception as exc:
+            logger.error("Error while sending a batch of SQS messages - %s", exc)
+            for single_entry in batch:
+                if not single_entry[2].done():
+                    single_entry[2].set_exception(SQSException(status_code=500, message=exc.__str__()))
+
+    def _try_send_batch(self, batch: list) -> None:
+        entries = {str(index): single_entry for index, single_entry in enumerate(batch)}
+        # Status code of the last failure of every entry still to be sent, a 429 when it was throttled
+        status_codes = dict()
+        for attempt in range(self._retry_policy.max_attempts):
+            try:
+                response = self._sqs.send_message_batch(
+                    queue_url=self._queue_url,
+                    entries=[{'Id': entry_id, 'MessageBody': entries[entry_id][0]} for entry_id in entries]
+                )
+            except SQSException as exc:
+                for single_entry in entries.values():
+                    single_entry[2].set_exception(exc)
+                return
+
+            for single_success in response.get('Successful', []):
+                entries.pop(single_success['Id'])[2].set_result(single_success['MessageId'])
+            for single_failure in response.get('Failed', []):
+                status_code = entry_status_code(
+                    code=single_failure['Code'],
+                    sender_fault=single_failure.get('SenderFault', False)
+                )
+                if status_code == 400:
+                    entries.pop(single_failure['Id'])[2].set_exception(SQSException(
+                        status_code=status_code,
+                        message=single_failure.get('Message', single_failure['Code'])
+                    ))
+                else:
+                    status_codes[single_failure['Id']] = status_code
+
+            if not entries or attempt == self._retry_policy.max_attempts - 1:
+                break
+            # Only the entries that failed on the server side or were throttled are sent again
+            if THROTTLED_STATUS_CODE in (status_codes.get(entry_id) for entry_id in entries):
+                self._sqs._get_rate_limiter().on_throttle()
+            record_retry(service='sqs', operation='send_message_batch', region=self._sqs._get_region())
+            sleep(self._retry_policy.delay(attempt=attempt))
+
+        if not entries:
+            return
+        logger.warning("%s SQS messages not sent after %s attempts", len(entries), self._retry_policy.max_attempts)
+        for entry_id, single_entry in entries.items():
+            single_entry[2].set_exception(SQSException(
+                status_code=status_codes.get(entry_id, 500),
+                message='Message not sent to SQS'
+            ))
@@ -1,22 +1,87 @@
-from datetime import datetime
-
 from abstractioutils.providers.aws.base import Base
+from abstractioutils.utils.metrics import instrumented
+from abstractioutils.utils.ttl_cache import TTLCache
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.retry import error_status_code
 from abstractioutils.exceptions.aws.ssm_exception import SSMException
 
+logger = get_logger(__name__)
+
+GET_PARAMETERS_MAX_NAMES = 10
 
+
+@instrumented('ssm')
 class SSM(Base):
-    def __init__(self):
-        super().__init__('ssm')
+    def __init__(self, cache_ttl: float = 300, cache_size: int = 256, region: str = None):
+        super().__init__('ssm', region)
+        self.__cache = TTLCache(ttl=cache_ttl, max_size=cache_size)
+
+    def get_parameter(self, name: str, use_cache: bool = True) -> str:
+        if use_cache:
+            value = self.__cache.get(name)
+            if value is not None:
+                return value
 
-    def get_parameter(self, name: str) -> str:
         try:
             parameter = self._get_client().get_parameter(
                 Name=name
             )
         except Exception as exc:
-            print(f"{datetime.now()} - Error while getting SSM param - {exc}")
-            raise SSMException(status_code=500, message=exc.__str__())
+            logger.error("Error while getting SSM param - %s", exc)
+            raise SSMException(status_code=error_status_code(exc), message=exc.__str__())
         if 'Parameter' not in parameter:
-            print(f"{datetime.now()} - Parameter {name} not found")
+            logger.warning("Parameter %s not found", name)
             raise SSMException(status_code=500, message='Parameter not found')
+
+        self.__cache.set(name, parameter['Parameter']['Value'])
         return parameter['Parameter']['Value']
+
+    def get_parameters(self, names: list, use_cache: bool = True) -> dict:
+        # Names that do not exist are left out of the returned dict
+        return_value = dict()
+        missing_names = list()
+        for name in dict.fromkeys(names):
+            value = self.__cache.get(name) if use_cache else None
+            if value is not None:
+                return_value[name] = value
+            else:
+                missing_names.append(name)
+
+        for index in range(0, len(missing_names), GET_PARAMETERS_MAX_NAMES):
+            try:
+                parameters = self._get_client().get_parameters(
+                    Names=missing_names[index:index + GET_PARAMETERS_MAX_NAMES]
+                )
+            except Exception as exc:
+                logger.error("Error while getting SSM params - %s", exc)
+                raise SSMException(status_code=error_status_code(exc), message=exc.__str__())
+
+            for single_parameter in parameters.get('Parameters', []):
+                self.__cache.set(single_parameter['Name'], single_parameter['Value'])
+                return_value[single_parameter['Name']] = single_parameter['Value']
+            if parameters.get('InvalidParameters'):
+                logger.warning("Parameters %s not found", parameters['InvalidParameters'])
+        return return_value
+
+    def get_parameters_by_path(self, path: str, recursive: bool = True) -> dict:
+        return_value = dict()
+        request = {
+            'Path': path,
+            'Recursive': recursive
+        }
+        try:
+            while True:
+                parameters = self._get_client().get_parameters_by_path(**request)
+                for single_parameter in parameters.get('Parameters', []):
+                    self.__cache.set(single_parameter['Name'], single_parameter['Value'])
+                    return_value[single_parameter['Name']] = single_parameter['Value']
+
+                if not parameters.get('NextToken'):
+                    return return_value
+                request['NextToken'] = parameters['NextToken']
+        except Exception as exc:
+            logger.error("Error while getting SSM params by path %s - %s", path, exc)
+            raise SSMException(status_code=error_status_code(exc), message=exc.__str__())
+
+    def invalidate(self, name: str = None) -> None:
+        self.__cache.invalidate(key=name)
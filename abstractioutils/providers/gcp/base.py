@@ -1,17 +1,132 @@
-import json
+import os
 import abc
+import threading
 
-from google.oauth2 import service_account
+from time import sleep
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from abstractioutils.providers.gcp.credentials import credentials_cache
+from abstractioutils.providers.gcp.discovery import build_service
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.metrics import record_retry
+from abstractioutils.utils.rate_limiter import rate_limiters
+from abstractioutils.utils.retry import RetryPolicy, error_status_code, is_throttle_error
+
+logger = get_logger(__name__)
+
+BATCH_MAX_REQUESTS = 1000
 
 
 class Base(metaclass=abc.ABCMeta):
     def __init__(self, service_account_info: str):
         self.__service_account_info = service_account_info
+        # httplib2 is not thread-safe, so every thread keeps its own service objects
+        self.__services = threading.local()
+        self.__retry_policy = RetryPolicy(max_attempts=int(os.environ.get('GCP_MAX_ATTEMPTS', 5)))
 
-    def __get_credentials(self, scopes: list) -> service_account.Credentials:
-        credentials = service_account.Credentials.from_service_account_info(json.loads(self.__service_account_info))
-        credentials = credentials.with_scopes([single_scope for single_scope in scopes])
-        return credentials
+    def __get_credentials(self, scopes: list):
+        # Providers built from the same service account share credentials and their access token
+        return credentials_cache.get(service_account_info=self.__service_account_info, scopes=scopes)
 
-    def _get_credentials(self) -> service_account.Credentials:
+    def _get_credentials(self):
         return self.__get_credentials(scopes=['https://www.googleapis.com/auth/cloud-platform'])
+
+    def _get_service(self, api: str, version: str, api_endpoint: str = None):
+        services = getattr(self.__services, 'cache', None)
+        if services is None:
+            services = self.__services.cache = dict()
+
+        key = (api, version, api_endpoint)
+        if key not in services:
+            services[key] = build_service(
+                api=api,
+                version=version,
+                credentials=self._get_credentials(),
+                api_endpoint=api_endpoint
+            )
+        return services[key]
+
+    def _get_http(self, timeout: float):
+        # Authorized http whose socket operations give up after timeout seconds. httplib2 sets the timeout
+        # when a connection is opened, so a new one is built for every bounded call.
+        import httplib2
+        import google_auth_httplib2
+
+        return google_auth_httplib2.AuthorizedHttp(self._get_credentials(), http=httplib2.Http(timeout=timeout))
+
+    def _execute(self, request, http=None):
+        # Every attempt waits for a token of the endpoint limiter, throttled requests are retried with backoff.
+        # The request goes through http if given, e.g. one from _get_http, and through the service's otherwise.
+        endpoint = urlparse(request.uri).netloc
+        api = request.methodId.split('.', 1)[0]
+        return self.__retry_policy.call(
+            function=lambda: request.execute(http=http),
+            limiter=rate_limiters.get(service=api, endpoint=endpoint),
+            on_retry=lambda exc: record_retry(service=api, operation=request.methodId, region=endpoint)
+        )
+
+    def _execute_batch(self, service, requests: list, exception_class) -> list:
+        # Sends the requests through the API batch endpoint, results are returned in input order
+        # and a failed request is reported as an exception_class instance in its slot.
+        # A batch is a single HTTP call, so it waits for one token of the endpoint limiter. Throttled requests
+        # are sent again in a later batch with the backoff of _execute, until the attempts run out.
+        results = [None] * len(requests)
+        if not requests:
+            return results
+
+        throttled = list()
+
+        def callback(request_id: str, response, exception) -> None:
+            index = int(request_id)
+            if exception is None:
+                results[index] = response
+                return
+            if is_throttle_error(exception):
+                throttled.append(index)
+            status_code = getattr(getattr(exception, 'resp', None), 'status', 500)
+            results[index] = exception_class(status_code=int(status_code), message=exception.__str__())
+
+        endpoint = urlparse(requests[0].uri).netloc
+        api = requests[0].methodId.split('.', 1)[0]
+        limiter = rate_limiters.get(service=api, endpoint=endpoint)
+        pending = list(range(len(requests)))
+        for attempt in range(self.__retry_policy.max_attempts):
+            del throttled[:]
+            for start in range(0, len(pending), BATCH_MAX_REQUESTS):
+                chunk = pending[start:start + BATCH_MAX_REQUESTS]
+                batch = service.new_batch_http_request(callback=callback)
+                for index in chunk:
+                    batch.add(requests[index], request_id=str(index))
+                limiter.acquire()
+                try:
+                    batch.execute()
+                except Exception as exc:
+                    logger.error("Error while executing the batch request - %s", exc)
+                    if is_throttle_error(exc):
+                        throttled.extend(chunk)
+                    for index in chunk:
+                        if results[index] is None or index in throttled:
+                            results[index] = exception_class(status_code=error_status_code(exc), message=exc.__str__())
+
+            if not throttled or attempt == self.__retry_policy.max_attempts - 1:
+                break
+            limiter.on_throttle()
+            record_retry(service=api, operation='batch', region=endpoint)
+            pending = sorted(set(throttled))
+            sleep(self.__retry_policy.delay(attempt=attempt))
+        return results
+
+    @staticmethod
+    def _execute_concurrently(calls: list, max_workers: int = 8) -> list:
+        # Fallback for endpoints without batch support, results and exceptions are returned in input order
+        def execute(call):
+            try:
+                return call()
+            except Exception as exc:
+                return exc
+
+        if not calls:
+            return list()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+            return list(executor.map(execute, calls))
@@ -1,88 +1,109 @@
-from datetime import datetime
-
 from abstractioutils.providers.gcp.base import Base
-from googleapiclient.discovery import build
+from abstractioutils.utils.metrics import instrumented, uninstrumented
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.retry import error_status_code
 
 from abstractioutils.exceptions.gcp.cloud_run_exception import CloudRunException
 
+logger = get_logger(__name__)
+
 
+@instrumented('cloud_run')
 class CloudRun(Base):
     def __init__(self, service_account_info: str):
         super().__init__(service_account_info)
 
-    def list_services(self, project_id: str, region: str) -> dict:
-        print(f"{datetime.now()} - Listing Cloud Run services...")
+    @staticmethod
+    def _regional_endpoint(region: str) -> str:
+        return f'https://{region}-run.googleapis.com/'
+
+    def list_services(self, project_id: str, region: str, page_size: int = None) -> dict:
+        # Follows metadata.continue, the returned list holds the services of every page
+        logger.debug("Listing Cloud Run services...")
 
-        service = build('run', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('run', 'v1', api_endpoint=self._regional_endpoint(region=region))
+        services, continue_token = None, None
         try:
-            service._baseUrl = f'https://{region}-run.googleapis.com'
-            return service.namespaces().services().list(
-                parent=f'namespaces/{project_id}'
-            ).execute()
+            while True:
+                # continue is a Python keyword, so it can only be passed unpacked
+                page = self._execute(service.namespaces().services().list(
+                    parent=f'namespaces/{project_id}',
+                    limit=page_size,
+                    **{'continue': continue_token}
+                ))
+                if services is None:
+                    services = page
+                    services['items'] = list(page.get('items', []))
+                else:
+                    services['items'].extend(page.get('items', []))
+
+                continue_token = page.get('metadata', dict()).get('continue')
+                if not continue_token:
+                    services.setdefault('metadata', dict()).pop('continue', None)
+                    return services
         except Exception as exc:
-            print(f"{datetime.now()} - Error while listing Cloud Run clusters - {exc.__str__()}")
-            raise CloudRunException(status_code=500, message='Error while listing Cloud Run clusters')
+            logger.error("Error while listing Cloud Run clusters - %s", exc)
+            raise CloudRunException(status_code=error_status_code(exc), message='Error while listing Cloud Run clusters')
 
     def get_service(self, name: str, region: str) -> dict:
-        print(f"{datetime.now()} - Getting Cloud Run service {name}...")
+        logger.debug("Getting Cloud Run service %s...", name)
 
-        service = build('run', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('run', 'v1', api_endpoint=self._regional_endpoint(region=region))
         try:
-            service._baseUrl = f'https://{region}-run.googleapis.com'
-            return service.namespaces().services().get(
+            return self._execute(service.namespaces().services().get(
                 name=name
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while getting Cloud Run cluster - {exc.__str__()}")
-            raise CloudRunException(status_code=500, message=f'Error while getting Cloud Run cluster {name}')
+            logger.error("Error while getting Cloud Run cluster - %s", exc)
+            raise CloudRunException(
+                status_code=error_status_code(exc),
+                message=f'Error while getting Cloud Run cluster {name}'
+            )
 
     def create_cloud_run_service(self, project_id: str, region: str, body: dict) -> dict:
-        print(f"{datetime.now()} - Creating the Cloud Run service...")
+        logger.debug("Creating the Cloud Run service...")
 
-        service = build('run', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('run', 'v1', api_endpoint=self._regional_endpoint(region=region))
         try:
-            service._baseUrl = f'https://{region}-run.googleapis.com'
-            return service.namespaces().services().create(
+            return self._execute(service.namespaces().services().create(
                 parent=f'namespaces/{project_id}',
                 body=body
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while creating Cloud Run service - {exc.__str__()}")
-            raise CloudRunException(status_code=500, message='Error while creating Cloud Run service')
+            logger.error("Error while creating Cloud Run service - %s", exc)
+            raise CloudRunException(status_code=error_status_code(exc), message='Error while creating Cloud Run service')
 
     def update_cloud_run_service(self, name: str, region: str, body: dict) -> dict:
-        print(f"{datetime.now()} - Updating the Cloud Run service...")
+        logger.debug("Updating the Cloud Run service...")
 
-        service = build('run', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('run', 'v1', api_endpoint=self._regional_endpoint(region=region))
         try:
-            service._baseUrl = f'https://{region}-run.googleapis.com'
-            return service.namespaces().services().replaceService(
+            return self._execute(service.namespaces().services().replaceService(
                 name=name,
                 body=body
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while updating Cloud Run service - {exc.__str__()}")
-            raise CloudRunException(status_code=500, message='Error while updating Cloud Run service')
+            logger.error("Error while updating Cloud Run service - %s", exc)
+            raise CloudRunException(status_code=error_status_code(exc), message='Error while updating Cloud Run service')
 
     def delete_cloud_run_service(self, service_name: str, region: str) -> dict:
-        print(f"{datetime.now()} - Deleting the {service_name} cloud run service...")
+        logger.debug("Deleting the %s cloud run service...", service_name)
 
-        service = build('run', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('run', 'v1', api_endpoint=self._regional_endpoint(region=region))
         try:
-            service._baseUrl = f'https://{region}-run.googleapis.com'
-            return service.namespaces().services().delete(
+            return self._execute(service.namespaces().services().delete(
                 name=service_name
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while deleting the service - {exc.__str__()}")
-            raise CloudRunException(status_code=500, message='Error while deleting the service')
+            logger.error("Error while deleting the service - %s", exc)
+            raise CloudRunException(status_code=error_status_code(exc), message='Error while deleting the service')
 
     def allow_unauthenticated_invokations(self, service_name: str) -> dict:
-        print(f"{datetime.now()} - Allowing unauth calls for the {service_name} service...")
+        logger.debug("Allowing unauth calls for the %s service...", service_name)
 
-        service = build('run', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('run', 'v1')
         try:
-            return service.projects().locations().services().setIamPolicy(
+            return self._execute(service.projects().locations().services().setIamPolicy(
                 resource=service_name,
                 body={
                     "policy": {
@@ -92,17 +113,17 @@ class CloudRun(Base):
                         }]
                     }
                 }
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while allowing unauth calls - {exc.__str__()}")
-            raise CloudRunException(status_code=500, message='Error while allowing unauth calls')
+            logger.error("Error while allowing unauth calls - %s", exc)
+            raise CloudRunException(status_code=error_status_code(exc), message='Error while allowing unauth calls')
 
     def unallow_unauthenticated_invokations(self, service_name: str) -> dict:
-        print(f"{datetime.now()} - Unallowing unauth calls for the {service_name} service...")
+        logger.debug("Unallowing unauth calls for the %s service...", service_name)
 
-        service = build('run', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('run', 'v1')
         try:
-            return service.projects().locations().services().setIamPolicy(
+            return self._execute(service.projects().locations().services().setIamPolicy(
                 resource=service_name,
                 body={
                     "policy": {
@@ -112,7 +133,25 @@ class CloudRun(Base):
                         }]
                     }
                 }
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while unallowing unauth calls - {exc.__str__()}")
-            raise CloudRunException(status_code=500, message='Error while unallowing unauth calls')
\ No newline at end of file
+            logger.error("Error while unallowing unauth calls - %s", exc)
+            raise CloudRunException(status_code=error_status_code(exc), message='Error while unallowing unauth calls')
+
+    @uninstrumented
+    def get_services(self, names: list, region: str, max_workers: int = 8) -> list:
+        # The regional Cloud Run endpoints have no batch support, so the calls run concurrently
+        return self._execute_concurrently(
+            calls=[lambda name=name: self.get_service(name=name, region=region) for name in names],
+            max_workers=max_workers
+        )
+
+    @uninstrumented
+    def delete_cloud_run_services(self, service_names: list, region: str, max_workers: int = 8) -> list:
+        return self._execute_concurrently(
+            calls=[
+                lambda service_name=service_name: self.delete_cloud_run_service(service_name=service_name, region=region)
+                for service_name in service_names
+            ],
+            max_workers=max_workers
+        )
@@ -1,69 +1,91 @@
-import os
+import socket
+import threading
 
-from datetime import datetime
-from time import sleep
+from time import monotonic
 
 from abstractioutils.providers.gcp.base import Base
-from googleapiclient.discovery import build
+from abstractioutils.utils.metrics import instrumented, uninstrumented
+from abstractioutils.utils.poller import Poller, deadline_from_env
+from abstractioutils.utils.log import get_logger
+from abstractioutils.utils.retry import error_status_code
 
 from abstractioutils.exceptions.gcp.compute_engine_exception import ComputeEngineException
 
+logger = get_logger(__name__)
 
+
+@instrumented('compute_engine')
 class ComputeEngine(Base):
     def __init__(self, service_account_info: str):
         super().__init__(service_account_info)
 
+        self._static_ip_poller = Poller(
+            deadline=deadline_from_env(
+                timeout_variable='STATIC_ADDRESS_TIMEOUT',
+                retries_variable='STATIC_ADDRESS_RETRIES',
+                default=60
+            )
+        )
+
     def reserve_static_ip_address(self, project: str, name: str, region: str) -> dict:
-        print(f"{datetime.now()} - Reserving static IP...")
+        logger.debug("Reserving static IP...")
 
-        service = build('compute', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('compute', 'v1')
         try:
-            return service.addresses().insert(
+            return self._execute(service.addresses().insert(
                 project=project,
                 region=region,
                 body={
                     "name": name
                 }
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while reserving static IP - {exc.__str__()}")
-            raise ComputeEngineException(status_code=500, message='Error while reserving static IP')
+            logger.error("Error while reserving static IP - %s", exc)
+            raise ComputeEngineException(status_code=error_status_code(exc), message='Error while reserving static IP')
 
     def delete_static_ip_address(self, project: str, region: str, address: str) -> dict:
-        print(f"{datetime.now()} - Deleting static IP {address}...")
+        logger.debug("Deleting static IP %s...", address)
 
-        service = build('compute', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('compute', 'v1')
         try:
-            return service.addresses().delete(
+            return self._execute(service.addresses().delete(
                 project=project,
                 region=region,
                 address=address
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while deleting static IP {address} - {exc.__str__()}")
-            raise ComputeEngineException(status_code=500, message='Error while deleting static IP')
+            logger.error("Error while deleting static IP %s - %s", address, exc)
+            raise ComputeEngineException(status_code=error_status_code(exc), message='Error while deleting static IP')
+
+    def get_static_ip_address(
+        self,
+        project: str,
+        name: str,
+        region: str,
+        cancel_event: threading.Event = None
+    ) -> (str, str):
+        logger.debug("Getting the %s static IP...", name)
+
+        service = self._get_service('compute', 'v1')
 
-    def get_static_ip_address(self, project: str, name: str, region: str) -> (str, str):
-        print(f"{datetime.now()} - Getting the {name} static IP...")
+        def probe():
+            static_ip = self._execute(service.addresses().get(
+                project=project,
+                region=region,
+                address=name
+            ))
+            if 'address' in static_ip and 'selfLink' in static_ip:
+                return static_ip['address'], static_ip['selfLink']
+            return None
 
-        service = build('compute', 'v1', credentials=self._get_credentials(), cache_discovery=False)
         try:
-            count = 0
-            while count < int(os.environ.get("STATIC_ADDRESS_RETRIES")):
-                static_ip = service.addresses().get(
-                    project=project,
-                    region=region,
-                    address=name
-                ).execute()
-
-                if 'address' in static_ip and 'selfLink' in static_ip:
-                    return static_ip['address'], static_ip['selfLink']
-                count += 1
-                sleep(5)
-            raise Exception("Not able to get IP address")
+            result = self._static_ip_poller.poll(probe=probe, name=f'Static IP {name}', cancel_event=cancel_event)
+            if not result.ready:
+                raise Exception("Not able to get IP address")
+            return result.value
         except Exception as exc:
-            print(f"{datetime.now()} - Error while getting static IP - {exc.__str__()}")
-            raise ComputeEngineException(status_code=500, message='Error while getting static IP')
+            logger.error("Error while getting static IP - %s", exc)
+            raise ComputeEngineException(status_code=error_status_code(exc), message='Error while getting static IP')
 
     def create_cloud_router_with_nat(
         self,
@@ -73,11 +95,11 @@ class ComputeEngine(Base):
         static_ip: str,
         subnetwork: str
     ) -> dict:
-        print(f"{datetime.now()} - Creating the Cloud Router...")
+        logger.debug("Creating the Cloud Router...")
 
-        service = build('compute', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('compute', 'v1')
         try:
-            return service.routers().insert(
+            return self._execute(service.routers().insert(
                 project=project,
                 region=region,
                 body={
@@ -93,10 +115,10 @@ class ComputeEngine(Base):
                     }],
                     "network": f"https://www.googleapis.com/compute/v1/projects/{project}/global/networks/abstractio"
                 }
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while creating Cloud Router - {exc.__str__()}")
-            raise ComputeEngineException(status_code=500, message='Error while creating Cloud Router')
+            logger.error("Error while creating Cloud Router - %s", exc)
+            raise ComputeEngineException(status_code=error_status_code(exc), message='Error while creating Cloud Router')
 
     def delete_cloud_router(
         self,
@@ -104,18 +126,21 @@ class ComputeEngine(Base):
         region: str,
         router_name: str
     ) -> dict:
-        print(f"{datetime.now()} - Deleting the Cloud Router {router_name}...")
+        logger.debug("Deleting the Cloud Router %s...", router_name)
 
-        service = build('compute', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('compute', 'v1')
         try:
-            return service.routers().delete(
+            return self._execute(service.routers().delete(
                 project=project,
                 region=region,
                 router=router_name
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while deleting the cloud router {router_name} - {exc.__str__()}")
-            raise ComputeEngineException(status_code=500, message='Error while creating the cloud router')
+            logger.error("Error while deleting the cloud router %s - %s", router_name, exc)
+            raise ComputeEngineException(
+                status_code=error_status_code(exc),
+                message='Error while creating the cloud router'
+            )
 
     def create_compute_engine_instance(
         self,
@@ -123,16 +148,16 @@ class ComputeEngine(Base):
         zone: str,
         body: dict
     ) -> dict:
-        service = build('compute', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('compute', 'v1')
         try:
-            return service.instances().insert(
+            return self._execute(service.instances().insert(
                 project=project,
                 zone=zone,
                 body=body
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while creating the VM {body['name']} - {exc.__str__()}")
-            raise ComputeEngineException(status_code=500, message='Error while creating the VM')
+            logger.error("Error while creating the VM %s - %s", body['name'], exc)
+            raise ComputeEngineException(status_code=error_status_code(exc), message='Error while creating the VM')
 
     def delete_compute_engine_virtual_machine(
         self,
@@ -140,15 +165,108 @@ class ComputeEngine(Base):
         zone: str,
         name: str
     ) -> dict:
-        print(f"{datetime.now()} - Deleting the {name} VM...")
+        logger.debug("Deleting the %s VM...", name)
 
-        service = build('compute', 'v1', credentials=self._get_credentials(), cache_discovery=False)
+        service = self._get_service('compute', 'v1')
         try:
-            return service.instances().delete(
+            return self._execute(service.instances().delete(
                 project=project,
                 zone=zone,
                 instance=name
-            ).execute()
+            ))
         except Exception as exc:
-            print(f"{datetime.now()} - Error while deleting the VM {name} - {exc.__str__()}")
-            raise ComputeEngineException(status_code=500, message='Error while deleting the VM')
\ No newline at end of file
+            logger.error("Error while deleting the VM %s - %s", name, exc)
+            raise ComputeEngineException(status_code=error_status_code(exc), message='Error while deleting the VM')
+
+    def delete_static_ip_addresses(self, project: str, region: str, addresses: list) -> list:
+        logger.debug("Deleting %s static IPs...", len(addresses))
+
+        service = self._get_service('compute', 'v1')
+        return self._execute_batch(
+            service=service,
+            requests=[
+                service.addresses().delete(project=project, region=region, address=address) for address in addresses
+            ],
+            exception_class=ComputeEngineException
+        )
+
+    def delete_cloud_routers(self, project: str, region: str, router_names: list) -> list:
+        logger.debug("Deleting %s Cloud Routers...", len(router_names))
+
+        service = self._get_service('compute', 'v1')
+        return self._execute_batch(
+            service=service,
+            requests=[
+                service.routers().delete(project=project, region=region, router=router_name)
+                for router_name in router_names
+            ],
+            exception_class=ComputeEngineException
+        )
+
+    def delete_compute_engine_virtual_machines(self, project: str, zone: str, names: list) -> list:
+        logger.debug("Deleting %s VMs...", len(names))
+
+        service = self._get_service('compute', 'v1')
+        return self._execute_batch(
+            service=service,
+            requests=[service.instances().delete(project=project, zone=zone, instance=name) for name in names],
+            exception_class=ComputeEngineException
+        )
+
+    @staticmethod
+    def _get_operation_scope(operation: dict) -> (str, dict):
+        # selfLink looks like .../projects/{project}/(regions/{region}/|zones/{zone}/|global/)operations/{name}
+        path = operation['selfLink'].split('/projects/', 1)[1].split('/')
+        parameters = {'project': path[0], 'operation': operation['name']}
+        if path[1] == 'regions':
+            parameters['region'] = path[2]
+            return 'regionOperations', parameters
+        if path[1] == 'zones':
+            parameters['zone'] = path[2]
+            return 'zoneOperations', parameters
+        return 'globalOperations', parameters
+
+    def wait_for_operation(self, operation: dict, deadline: float = 300) -> dict:
+        # Blocks on the server-side wait endpoint, which returns as soon as the operation is DONE
+        # or after about two minutes. Every wait call is cut off at the time left, so the deadline
+        # in seconds bounds the whole call.
+        logger.debug("Waiting for the operation %s...", operation['name'])
+
+        service = self._get_service('compute', 'v1')
+        collection, parameters = self._get_operation_scope(operation=operation)
+        start = monotonic()
+        try:
+            while operation.get('status') != 'DONE':
+                remaining = start + deadline - monotonic()
+                if remaining <= 0:
+                    raise Exception(f"Operation {operation['name']} not done after {deadline}s")
+                try:
+                    operation = self._execute(
+                        getattr(service, collection)().wait(**parameters),
+                        http=self._get_http(timeout=remaining)
+                    )
+                except socket.timeout:
+                    raise Exception(f"Operation {operation['name']} not done after {deadline}s")
+        except Exception as exc:
+            logger.error("Error while waiting for the operation - %s", exc)
+            raise ComputeEngineException(
+                status_code=error_status_code(exc),
+                message='Error while waiting for the operation'
+            )
+
+        if 'error' in operation:
+            logger.error("Operation %s failed - %s", operation['name'], operation['error'])
+            raise ComputeEngineException(status_code=500, message=f"Operation {operation['name']} failed")
+        logger.debug("Operation %s done in %.2fs", operation['name'], monotonic() - start)
+        return operation
+
+    @uninstrumented
+    def wait_for_operations(self, operations: list, deadline: float = 300, max_workers: int = 8) -> list:
+        # Waits on every operation concurrently, results and exceptions are returned in input order
+        return self._execute_concurrently(
+            calls=[
+                lambda operation=operation: self.wait_for_operation(operation=operation, deadline=deadline)
+                for operation in operations
+            ],
+            max_workers=max_workers
+        )
@@ -0,0 +1,81 @@
+import json
+import threading
+
+from datetime import datetime, timedelta
+
+
+EXPIRY_MARGIN = timedelta(seconds=60)
+
+_shared_credentials_class = None
+
+
+def _define_shared_credentials():
+    # google-auth is only imported when the first credentials are built
+    from google.oauth2 import service_account
+
+    class SharedCredentials(service_account.Credentials):
+        # Service account credentials shared between threads, the token is refreshed by one thread at a time
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.__refresh_lock = threading.Lock()
+
+        def _is_fresh(self) -> bool:
+            return self.token is not None and (self.expiry is None or self.expiry - EXPIRY_MARGIN > datetime.utcnow())
+
+        def refresh(self, request) -> None:
+            if self._is_fresh():
+                return
+            with self.__refresh_lock:
+                # Another thread may have refreshed the token while we were waiting
+                if not self._is_fresh():
+                    super().refresh(request)
+
+    return SharedCredentials
+
+
+def shared_credentials_class():
+    # Called under the CredentialsCache lock, so the class is only defined once
+    global _shared_credentials_class
+    if _shared_credentials_class is None:
+        _shared_credentials_class = _define_shared_credentials()
+    return _shared_credentials_class
+
+
+class CredentialsCache(object):
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__identities = dict()
+        self.__credentials = dict()
+
+    def __get_identity(self, service_account_info: str) -> (tuple, dict):
+        identity = self.__identities.get(service_account_info)
+        if identity is None:
+            info = json.loads(service_account_info)
+            identity = ((info.get('client_email'), info.get('private_key_id')), info)
+            self.__identities[service_account_info] = identity
+        return identity
+
+    def get(self, service_account_info: str, scopes: list):
+        with self.__lock:
+            identity, info = self.__get_identity(service_account_info=service_account_info)
+            key = (identity, tuple(sorted(scopes)))
+            credentials = self.__credentials.get(key)
+            if credentials is None:
+                credentials = shared_credentials_class().from_service_account_info(info, scopes=list(scopes))
+                self.__credentials[key] = credentials
+            return credentials
+
+    def invalidate(self, service_account_info: str = None) -> None:
+        with self.__lock:
+            if service_account_info is None:
+                self.__identities.clear()
+                self.__credentials.clear()
+                return
+
+            identity = self.__identities.pop(service_account_info, None)
+            if identity is not None:
+                for key in [key for key in self.__credentials if key[0] == identity[0]]:
+                    del self.__credentials[key]
+
+
+credentials_cache = CredentialsCache()
@@ -0,0 +1,38 @@
+import os
+import gzip
+import json
+import threading
+
+from abstractioutils.utils.lazy_import import lazy_import
+
+discovery = lazy_import('googleapiclient.discovery')
+
+
+DOCUMENTS_DIR = os.path.join(os.path.dirname(__file__), 'discovery_documents')
+
+_documents = dict()
+_documents_lock = threading.Lock()
+
+
+def get_discovery_document(api: str, version: str):
+    # Bundled documents are parsed once per process, missing ones are reported as None
+    key = (api, version)
+    if key not in _documents:
+        with _documents_lock:
+            if key not in _documents:
+                path = os.path.join(DOCUMENTS_DIR, f'{api}.{version}.json.gz')
+                if os.path.exists(path):
+                    with gzip.open(path, 'rt') as document:
+                        _documents[key] = json.load(document)
+                else:
+                    _documents[key] = None
+    return _documents[key]
+
+
+def build_service(api: str, version: str, credentials, api_endpoint: str = None):
+    client_options = {'api_endpoint': api_endpoint} if api_endpoint is not None else None
+
+    document = get_discovery_document(api=api, version=version)
+    if document is not None:
+        return discovery.build_from_document(document, credentials=credentials, client_options=client_options)
+    return discovery.build(api, version, credentials=credentials, client_options=client_options, cache_discovery=False)
@@ -0,0 +1,112 @@
+import threading
+
+from time import monotonic
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from abstractioutils.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class Step(object):
+    # action receives the results of the finished steps by name, undo receives them plus this step's own result
+    def __init__(
+        self,
+        name: str,
+        action: Callable[[dict], object],
+        depends_on: tuple = (),
+        undo: Optional[Callable[[dict], None]] = None
+    ):
+        self.name = name
+        self.action = action
+        self.depends_on = tuple(depends_on)
+        self.undo = undo
+
+
+class DagResult(object):
+    def __init__(self):
+        self.succeeded = False
+        self.results = dict()
+        self.timings = dict()
+        self.failed_step = None
+        self.error = None
+        self.undone_steps = list()
+        self.elapsed = 0
+
+
+class DagRunner(object):
+    # Runs every step as soon as its dependencies are done, independent steps run concurrently.
+    # When a step fails no new step is started and the completed ones are undone in reverse completion order.
+    def __init__(self, steps: list, max_workers: int = 4):
+        names = {single_step.name for single_step in steps}
+        for single_step in steps:
+            missing = set(single_step.depends_on) - names
+            if missing:
+                raise ValueError(f"Step {single_step.name} depends on unknown steps {missing}")
+        self._steps = list(steps)
+        self._max_workers = max_workers
+
+    def run(self) -> DagResult:
+        result = DagResult()
+        start = monotonic()
+        lock = threading.Lock()
+        pending = list(self._steps)
+        completed = list()
+        running = dict()
+
+        def execute(step: Step):
+            step_start = monotonic()
+            with lock:
+                context = dict(result.results)
+            try:
+                return step.action(context)
+            finally:
+                result.timings[step.name] = {
+                    'start': step_start - start,
+                    'duration': monotonic() - step_start
+                }
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            while pending or running:
+                if result.error is None:
+                    for single_step in [step for step in pending if set(step.depends_on) <= set(completed)]:
+                        pending.remove(single_step)
+                        running[executor.submit(execute, single_step)] = single_step
+                elif not running:
+                    break
+                if not running:
+                    result.error = ValueError(f"Steps {[step.name for step in pending]} can never run")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as exc:
+                        logger.error("Step %s failed - %s", step.name, exc)
+                        if result.error is None:
+                            result.failed_step, result.error = step.name, exc
+                        continue
+                    with lock:
+                        result.results[step.name] = value
+                    completed.append(step.name)
+
+        if result.error is not None:
+            self._undo(completed=completed, result=result)
+        else:
+            result.succeeded = True
+        result.elapsed = monotonic() - start
+        return result
+
+    def _undo(self, completed: list, result: DagResult) -> None:
+        steps = {single_step.name: single_step for single_step in self._steps}
+        for name in reversed(completed):
+            if steps[name].undo is None:
+                continue
+            try:
+                steps[name].undo(dict(result.results))
+                result.undone_steps.append(name)
+            except Exception as exc:
+                logger.error("Error while undoing step %s - %s", name, exc)
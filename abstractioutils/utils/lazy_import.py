@@ -0,0 +1,20 @@
+import importlib
+
+
+class LazyModule(object):
+    # Stands in for a module and imports it on first attribute access, the import lock keeps it thread-safe
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attribute: str):
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self.__name}'>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name=name)
@@ -0,0 +1,52 @@
+import json
+import logging
+
+from datetime import datetime, timezone
+
+LIBRARY_LOGGER = 'abstractioutils'
+
+# Nothing is printed unless the application configures logging
+logging.getLogger(LIBRARY_LOGGER).addHandler(logging.NullHandler())
+
+# Fields passed through logging's extra argument that the JSON formatter carries over
+STRUCTURED_FIELDS = ('cluster_id', 'operation', 'service', 'region')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def configure_logging(level: int = logging.INFO, json_format: bool = False, levels: dict = None) -> None:
+    # levels overrides single modules, e.g. {'abstractioutils.utils.poller': logging.WARNING}
+    handler = logging.StreamHandler()
+    if json_format:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
+
+    logger = logging.getLogger(LIBRARY_LOGGER)
+    for single_handler in list(logger.handlers):
+        if not isinstance(single_handler, logging.NullHandler):
+            logger.removeHandler(single_handler)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    for name, module_level in (levels or dict()).items():
+        logging.getLogger(name).setLevel(module_level)
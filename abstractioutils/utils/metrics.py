@@ -0,0 +1,262 @@
+import abc
+import socket
+import inspect
+import functools
+import contextlib
+import threading
+
+from time import perf_counter
+from collections import deque
+from typing import Callable
+
+from abstractioutils.utils.retry import THROTTLED_STATUS_CODE
+
+
+class MetricsSink(metaclass=abc.ABCMeta):
+    # A call ends either successfully, throttled or with an error, a throttled call is not an error
+    @abc.abstractmethod
+    def record_call(
+        self,
+        service: str,
+        operation: str,
+        region: str,
+        latency: float,
+        error: bool,
+        throttled: bool = False
+    ) -> None:
+        pass
+
+    def record_retry(self, service: str, operation: str, region: str) -> None:
+        pass
+
+
+class NoopSink(MetricsSink):
+    def record_call(
+        self,
+        service: str,
+        operation: str,
+        region: str,
+        latency: float,
+        error: bool,
+        throttled: bool = False
+    ) -> None:
+        pass
+
+
+class CallbackSink(MetricsSink):
+    def __init__(self, callback: Callable[[dict], None]):
+        self._callback = callback
+
+    def record_call(
+        self,
+        service: str,
+        operation: str,
+        region: str,
+        latency: float,
+        error: bool,
+        throttled: bool = False
+    ) -> None:
+        self._callback({
+            'type': 'call',
+            'service': service,
+            'operation': operation,
+            'region': region,
+            'latency': latency,
+            'error': error,
+            'throttled': throttled
+        })
+
+    def record_retry(self, service: str, operation: str, region: str) -> None:
+        self._callback({'type': 'retry', 'service': service, 'operation': operation, 'region': region})
+
+
+class InMemorySink(MetricsSink):
+    # Keeps the last max_samples latencies of every (service, operation, region) to compute percentiles
+    def __init__(self, max_samples: int = 10000):
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stats = dict()
+
+    def _get_stats(self, key: tuple) -> dict:
+        if key not in self._stats:
+            self._stats[key] = {
+                'calls': 0,
+                'errors': 0,
+                'throttled': 0,
+                'retries': 0,
+                'latencies': deque(maxlen=self._max_samples)
+            }
+        return self._stats[key]
+
+    def record_call(
+        self,
+        service: str,
+        operation: str,
+        region: str,
+        latency: float,
+        error: bool,
+        throttled: bool = False
+    ) -> None:
+        with self._lock:
+            stats = self._get_stats(key=(service, operation, region))
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['throttled'] += int(throttled)
+            stats['latencies'].append(latency)
+
+    def record_retry(self, service: str, operation: str, region: str) -> None:
+        with self._lock:
+            self._get_stats(key=(service, operation, region))['retries'] += 1
+
+    @staticmethod
+    def _percentile(latencies: list, percentile: float) -> float:
+        return latencies[min(int(len(latencies) * percentile), len(latencies) - 1)] if latencies else 0
+
+    def snapshot(self) -> list:
+        with self._lock:
+            stats = [(key, dict(value, latencies=sorted(value['latencies']))) for key, value in self._stats.items()]
+        return [
+            {
+                'service': service,
+                'operation': operation,
+                'region': region,
+                'calls': value['calls'],
+                'errors': value['errors'],
+                'throttled': value['throttled'],
+                'retries': value['retries'],
+                'p50': self._percentile(value['latencies'], 0.50),
+                'p99': self._percentile(value['latencies'], 0.99)
+            }
+            for (service, operation, region), value in stats
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+class StatsDSink(MetricsSink):
+    # Fire-and-forget UDP datagrams in the StatsD format with DogStatsD-style tags
+    def __init__(self, host: str = 'localhost', port: int = 8125, prefix: str = 'abstractioutils'):
+        self._address = (host, port)
+        self._prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _send(self, metric: str) -> None:
+        try:
+            self._socket.sendto(metric.encode('utf-8'), self._address)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _tags(service: str, operation: str, region: str) -> str:
+        return f"#service:{service},operation:{operation},region:{region or 'default'}"
+
+    def record_call(
+        self,
+        service: str,
+        operation: str,
+        region: str,
+        latency: float,
+        error: bool,
+        throttled: bool = False
+    ) -> None:
+        tags = self._tags(service=service, operation=operation, region=region)
+        self._send(f"{self._prefix}.calls:1|c|{tags}")
+        self._send(f"{self._prefix}.latency:{latency * 1000:.3f}|ms|{tags}")
+        if error:
+            self._send(f"{self._prefix}.errors:1|c|{tags}")
+        if throttled:
+            self._send(f"{self._prefix}.throttled:1|c|{tags}")
+
+    def record_retry(self, service: str, operation: str, region: str) -> None:
+        self._send(f"{self._prefix}.retries:1|c|{self._tags(service=service, operation=operation, region=region)}")
+
+
+NOOP_SINK = NoopSink()
+_sink = NOOP_SINK
+
+
+def set_sink(sink: MetricsSink = None) -> None:
+    global _sink
+    _sink = sink if sink is not None else NOOP_SINK
+
+
+def get_sink() -> MetricsSink:
+    return _sink
+
+
+def record_retry(service: str, operation: str, region: str = None) -> None:
+    if _sink is not NOOP_SINK:
+        _sink.record_retry(service=service, operation=operation, region=region)
+
+
+def _get_region(instance, kwargs: dict):
+    if kwargs.get('region') is not None:
+        return kwargs['region']
+    get_region = getattr(instance, '_get_region', None)
+    if get_region is None:
+        return None
+    try:
+        return get_region()
+    except Exception:
+        # e.g. no region configured, the call itself already failed for the same reason
+        return None
+
+
+@contextlib.contextmanager
+def timed_call(service: str, operation: str, instance=None, region: str = None):
+    # Times one call, for the calls the instrumented decorator cannot wrap such as the pages of a generator
+    sink = _sink
+    if sink is NOOP_SINK:
+        yield
+        return
+
+    start = perf_counter()
+    error, throttled = False, False
+    try:
+        yield
+    except Exception as exc:
+        throttled = getattr(exc, 'status_code', None) == THROTTLED_STATUS_CODE
+        error = not throttled
+        raise
+    finally:
+        sink.record_call(
+            service=service,
+            operation=operation,
+            region=_get_region(instance=instance, kwargs={'region': region}),
+            latency=perf_counter() - start,
+            error=error,
+            throttled=throttled
+        )
+
+
+def _instrument(function, service: str):
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if _sink is NOOP_SINK:
+            return function(self, *args, **kwargs)
+
+        with timed_call(service=service, operation=function.__name__, instance=self, region=kwargs.get('region')):
+            return function(self, *args, **kwargs)
+    return wrapper
+
+
+def uninstrumented(function):
+    # Marks a public method left out by instrumented, e.g. one fanning out to other instrumented methods
+    function.__uninstrumented__ = True
+    return function
+
+
+def instrumented(service: str):
+    # Class decorator timing every public method, generators are left alone since they return immediately and time
+    # their calls with timed_call
+    def decorator(cls):
+        for name, attribute in list(vars(cls).items()):
+            if name.startswith('_') or not inspect.isfunction(attribute) or inspect.isgeneratorfunction(attribute):
+                continue
+            if getattr(attribute, '__uninstrumented__', False):
+                continue
+            setattr(cls, name, _instrument(function=attribute, service=service))
+        return cls
+    return decorator
@@ -0,0 +1,109 @@
+import os
+import random
+import threading
+
+from time import monotonic
+from typing import Awaitable, Callable, Optional
+
+from abstractioutils.utils.lazy_import import lazy_import
+from abstractioutils.utils.log import get_logger
+
+asyncio = lazy_import('asyncio')
+
+logger = get_logger(__name__)
+
+
+class PollResult(object):
+    def __init__(self, ready: bool, value, attempts: int, elapsed: float, cancelled: bool = False):
+        self.ready = ready
+        self.value = value
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.cancelled = cancelled
+
+
+class Poller(object):
+    # Calls a probe until it returns something other than None or the deadline expires.
+    # The first probe runs immediately, the following ones back off exponentially with jitter.
+    def __init__(
+        self,
+        deadline: float,
+        initial_delay: float = 0.5,
+        max_delay: float = 5,
+        multiplier: float = 2,
+        jitter: float = 0.2,
+        on_result: Optional[Callable[[str, PollResult], None]] = None
+    ):
+        self.deadline = deadline
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.on_result = on_result
+
+    def _delays(self):
+        delay = self.initial_delay
+        while True:
+            yield delay * (1 - self.jitter * random.random())
+            delay = min(delay * self.multiplier, self.max_delay)
+
+    def poll(
+        self,
+        probe: Callable[[], object],
+        name: str = 'poll',
+        cancel_event: Optional[threading.Event] = None
+    ) -> PollResult:
+        cancel_event = cancel_event or threading.Event()
+        start = monotonic()
+        attempts = 0
+        delays = self._delays()
+        while True:
+            attempts += 1
+            value = probe()
+            if value is not None:
+                return self.__report(name, PollResult(True, value, attempts, monotonic() - start))
+
+            remaining = self.deadline - (monotonic() - start)
+            if remaining <= 0:
+                return self.__report(name, PollResult(False, None, attempts, monotonic() - start))
+            if cancel_event.wait(min(next(delays), remaining)):
+                return self.__report(name, PollResult(False, None, attempts, monotonic() - start, cancelled=True))
+
+    async def poll_async(self, probe: Callable[[], Awaitable], name: str = 'poll') -> PollResult:
+        # Asyncio counterpart of poll, cancellation goes through the usual task cancellation
+        start = monotonic()
+        attempts = 0
+        delays = self._delays()
+        while True:
+            attempts += 1
+            value = await probe()
+            if value is not None:
+                return self.__report(name, PollResult(True, value, attempts, monotonic() - start))
+
+            remaining = self.deadline - (monotonic() - start)
+            if remaining <= 0:
+                return self.__report(name, PollResult(False, None, attempts, monotonic() - start))
+            await asyncio.sleep(min(next(delays), remaining))
+
+    def __report(self, name: str, result: PollResult) -> PollResult:
+        logger.info(
+            "%s finished after %s attempts in %.2fs (ready: %s, cancelled: %s)",
+            name,
+            result.attempts,
+            result.elapsed,
+            result.ready,
+            result.cancelled,
+            extra={'operation': 'poll'}
+        )
+        if self.on_result is not None:
+            self.on_result(name, result)
+        return result
+
+
+def deadline_from_env(timeout_variable: str, retries_variable: str, default: float, retry_interval: float = 5) -> float:
+    # The *_RETRIES variables are kept for backward compatibility, they used to count 5 seconds sleeps
+    if os.environ.get(timeout_variable) is not None:
+        return float(os.environ.get(timeout_variable))
+    if os.environ.get(retries_variable) is not None:
+        return int(os.environ.get(retries_variable)) * retry_interval
+    return default
@@ -0,0 +1,131 @@
+import os
+import threading
+
+from time import monotonic, sleep
+
+
+class AdaptiveRateLimiter(object):
+    # Token bucket whose rate halves on throttling and then recovers linearly, up to max_rate if given.
+    # Without a starting rate it only measures the send rate, the first throttle starts limiting from there.
+    def __init__(
+        self,
+        rate: float = None,
+        burst: float = None,
+        min_rate: float = 1,
+        max_rate: float = None,
+        decrease: float = 0.5,
+        recovery: float = None
+    ):
+        self.__rate = rate
+        self.__burst = burst
+        self.__min_rate = min_rate
+        self.__max_rate = max_rate if max_rate is not None else rate
+        self.__decrease = decrease
+        self.__recovery = recovery
+        self.__tokens = self.__get_burst()
+        self.__updated = monotonic()
+        self.__lock = threading.Lock()
+
+        self.__window_start = self.__updated
+        self.__window_count = 0
+        self.__measured_rate = 0
+        self.__decreased_at = None
+
+        self.throttles = 0
+
+    def __get_burst(self) -> float:
+        if self.__rate is None:
+            return 0
+        return self.__burst if self.__burst is not None else max(1, self.__rate)
+
+    def __measure(self, now: float) -> None:
+        self.__window_count += 1
+        if now - self.__window_start >= 1:
+            self.__measured_rate = self.__window_count / (now - self.__window_start)
+            self.__window_start, self.__window_count = now, 0
+
+    def __refill(self, now: float) -> None:
+        elapsed = now - self.__updated
+        self.__updated = now
+        if self.__rate is None:
+            return
+        if self.__recovery and (self.__max_rate is None or self.__rate < self.__max_rate):
+            self.__rate += self.__recovery * elapsed
+            if self.__max_rate is not None:
+                self.__rate = min(self.__rate, self.__max_rate)
+        self.__tokens = min(self.__get_burst(), self.__tokens + elapsed * self.__rate)
+
+    def get_rate(self):
+        with self.__lock:
+            return self.__rate
+
+    def acquire(self, timeout: float = None) -> bool:
+        # Blocks until a token is available, False if it would take longer than timeout seconds
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            with self.__lock:
+                now = monotonic()
+                self.__refill(now=now)
+                if self.__rate is None or self.__tokens >= 1:
+                    if self.__rate is not None:
+                        self.__tokens -= 1
+                    self.__measure(now=now)
+                    return True
+                wait = (1 - self.__tokens) / self.__rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            sleep(wait)
+
+    def on_throttle(self) -> None:
+        with self.__lock:
+            self.throttles += 1
+            now = monotonic()
+            # Calls already in flight are throttled together, they count as a single signal
+            if self.__decreased_at is not None and now - self.__decreased_at < 1:
+                return
+            self.__decreased_at = now
+            self.__refill(now=now)
+            current_rate = self.__rate
+            if current_rate is None:
+                elapsed = now - self.__window_start
+                current_rate = max(self.__measured_rate, self.__window_count / elapsed if elapsed > 0 else 0)
+            self.__rate = max(self.__min_rate, current_rate * self.__decrease)
+            if self.__recovery is None:
+                # Back to the throttled rate in about ten seconds unless more throttles arrive
+                self.__recovery = max(self.__min_rate, current_rate - self.__rate) / 10
+            self.__tokens = min(self.__tokens, self.__get_burst())
+
+
+class RateLimiterRegistry(object):
+    # One limiter per service and endpoint, shared by every client talking to it.
+    # Starting rates come from configure() or the RATE_LIMIT_<SERVICE> environment variable, in requests per second.
+    def __init__(self):
+        self.__limiters = dict()
+        self.__settings = dict()
+        self.__lock = threading.Lock()
+
+    def configure(self, service: str, rate: float = None, burst: float = None, min_rate: float = 1) -> None:
+        # The limiters of the service start over with the new settings
+        with self.__lock:
+            self.__settings[service] = {'rate': rate, 'burst': burst, 'min_rate': min_rate}
+            for key in [key for key in self.__limiters if key[0] == service]:
+                del self.__limiters[key]
+
+    def __get_settings(self, service: str) -> dict:
+        if service in self.__settings:
+            return self.__settings[service]
+        rate = os.environ.get(f'RATE_LIMIT_{service.upper()}')
+        return {'rate': float(rate) if rate else None}
+
+    def get(self, service: str, endpoint: str = None) -> AdaptiveRateLimiter:
+        key = (service, endpoint)
+        limiter = self.__limiters.get(key)
+        if limiter is None:
+            with self.__lock:
+                limiter = self.__limiters.get(key)
+                if limiter is None:
+                    limiter = self.__limiters[key] = AdaptiveRateLimiter(**self.__get_settings(service=service))
+        return limiter
+
+
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,93 @@
+import random
+
+from time import sleep
+from typing import Callable, Optional
+
+from abstractioutils.utils.rate_limiter import AdaptiveRateLimiter
+
+THROTTLED_STATUS_CODE = 429
+
+# Same codes botocore's retry handlers treat as throttling, plus the SNS one
+THROTTLING_ERROR_CODES = (
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'TransactionInProgressException',
+    'RequestLimitExceeded',
+    'BandwidthLimitExceeded',
+    'LimitExceededException',
+    'RequestThrottled',
+    'SlowDown',
+    'PriorRequestNotComplete',
+    'EC2ThrottledException',
+    'Throttled'
+)
+
+# Google APIs answer 429, or 403 with one of these reasons
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+
+def is_throttle_error(exc: Exception) -> bool:
+    # Works on botocore ClientError and googleapiclient HttpError without importing either
+    response = getattr(exc, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+    resp = getattr(exc, 'resp', None)
+    if resp is not None:
+        status = int(getattr(resp, 'status', 0))
+        if status == THROTTLED_STATUS_CODE:
+            return True
+        if status == 403:
+            content = getattr(exc, 'content', b'')
+            content = content.decode('utf-8', 'replace') if isinstance(content, bytes) else str(content)
+            return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return getattr(exc, 'status_code', None) == THROTTLED_STATUS_CODE
+
+
+def error_status_code(exc: Exception) -> int:
+    # Status code of the provider exception wrapping exc, throttling is reported apart from other failures
+    return THROTTLED_STATUS_CODE if is_throttle_error(exc) else 500
+
+
+def entry_status_code(code: str, sender_fault: bool = False) -> int:
+    # Status code of a failed entry in a batch response, a throttled entry is reported like a throttled call
+    if code in THROTTLING_ERROR_CODES:
+        return THROTTLED_STATUS_CODE
+    return 400 if sender_fault else 500
+
+
+class RetryPolicy(object):
+    # Retries throttled calls with exponential backoff and full jitter, any other error is raised at once
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.1, max_delay: float = 10):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.random() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def call(
+        self,
+        function: Callable[[], object],
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        on_retry: Optional[Callable[[Exception], None]] = None
+    ):
+        for attempt in range(self.max_attempts):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                return function()
+            except Exception as exc:
+                if not is_throttle_error(exc):
+                    raise
+                if limiter is not None:
+                    limiter.on_throttle()
+                if attempt == self.max_attempts - 1:
+                    raise
+                if on_retry is not None:
+                    on_retry(exc)
+                sleep(self.delay(attempt=attempt))
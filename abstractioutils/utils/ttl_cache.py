@@ -0,0 +1,58 @@
+import threading
+
+from time import monotonic
+from collections import OrderedDict
+
+
+class TTLCache(object):
+    # Thread-safe LRU cache whose entries expire ttl seconds after being set, a ttl of 0 disables it
+    def __init__(self, ttl: float, max_size: int):
+        self.__ttl = ttl
+        self.__max_size = max_size
+        self.__items = OrderedDict()
+        self.__lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def is_enabled(self) -> bool:
+        return self.__ttl > 0 and self.__max_size > 0
+
+    def get(self, key, default=None):
+        with self.__lock:
+            item = self.__items.get(key)
+            if item is None or item[1] <= monotonic():
+                if item is not None:
+                    del self.__items[key]
+                self.misses += 1
+                return default
+
+            self.__items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value) -> None:
+        if not self.is_enabled():
+            return
+        with self.__lock:
+            self.__items[key] = (value, monotonic() + self.__ttl)
+            self.__items.move_to_end(key)
+            while len(self.__items) > self.__max_size:
+                self.__items.popitem(last=False)
+
+    def merge(self, key, function) -> None:
+        # Replaces a live entry with function(value), keeping its expiry and leaving the counters untouched
+        with self.__lock:
+            item = self.__items.get(key)
+            if item is not None and item[1] > monotonic():
+                self.__items[key] = (function(item[0]), item[1])
+
+    def invalidate(self, key=None) -> None:
+        with self.__lock:
+            if key is None:
+                self.__items.clear()
+            else:
+                self.__items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.__items)
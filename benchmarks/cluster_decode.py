@@ -0,0 +1,116 @@
+"""
+Items decoded per second from the DynamoDB wire format into ClusterDTO.
+
+"legacy" is the hand-written mapping CommonOperations._lint_cluster used to do,
+"validated" and "trusted" are cluster_codec.decode_many with and without pydantic validation.
+The benchmark fails when a decoder gets slower by more than --tolerance against --baseline.
+
+    python benchmarks/cluster_decode.py [items] [--baseline benchmarks/cluster_decode_baseline.json] [--tolerance 1.5]
+    python benchmarks/cluster_decode.py --write-baseline benchmarks/cluster_decode_baseline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Running a benchmark as a script only puts benchmarks/ on sys.path, the package is imported from this checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from abstractioutils.dto import cluster_codec
+from abstractioutils.dto.cluster_dto import ClusterDTO
+
+
+def make_item(index: int) -> dict:
+    return {
+        'id': {'S': f'cluster-{index}'},
+        'image_url': {'S': 'gcr.io/project/image:latest'},
+        'vcpus': {'N': '2'},
+        'memory': {'N': '4096'},
+        'user_id': {'S': 'user'},
+        'port': {'N': '8080'},
+        'has_ip': {'BOOL': True},
+        'type': {'S': 'cloud_run'},
+        'region': {'S': 'europe-west1'},
+        'status': {'S': 'COMPLETED'},
+        'creation_date': {'S': '2021-04-01T10:00:00'},
+        'env_variables': {'SS': [f'KEY_{key}=value={key}' for key in range(10)]},
+        'gcp_project': {'S': 'project'},
+        'endpoint': {'S': f'https://cluster-{index}.a.run.app'},
+        'ip_address': {'S': '10.0.0.1'}
+    }
+
+
+def legacy_decode(dynamo_obj: dict) -> ClusterDTO:
+    env_variables = dict()
+    for single_item in dynamo_obj['env_variables']['SS']:
+        split_item = single_item.split('=', 1)
+        env_variables[split_item[0]] = split_item[1]
+
+    return ClusterDTO.parse_obj({
+        'id': dynamo_obj['id']['S'],
+        'name': dynamo_obj['id']['S'],
+        'image_url': dynamo_obj['image_url']['S'],
+        'vcpus': dynamo_obj['vcpus']['N'],
+        'memory': dynamo_obj['memory']['N'],
+        'user_id': dynamo_obj['user_id']['S'],
+        'port': dynamo_obj['port']['N'],
+        'has_ip': dynamo_obj['has_ip']['BOOL'],
+        'type': dynamo_obj['type']['S'],
+        'region': dynamo_obj['region']['S'],
+        'status': dynamo_obj['status']['S'],
+        'creation_date': dynamo_obj['creation_date']['S'],
+        'env_variables': env_variables,
+        'project': dynamo_obj['gcp_project']['S'] if dynamo_obj.get('gcp_project') else None,
+        'endpoint': dynamo_obj['endpoint']['S'] if dynamo_obj.get('endpoint') else None,
+        'ip_address': dynamo_obj['ip_address']['S'] if dynamo_obj.get('ip_address') else None,
+        'error_message': dynamo_obj['error_message']['S'] if dynamo_obj.get('error_message') else None,
+        'username': dynamo_obj['username']['S'] if dynamo_obj.get('username') else None,
+        'password': dynamo_obj['password']['S'] if dynamo_obj.get('password') else None
+    })
+
+
+def items_per_second(function, items: list) -> float:
+    start = time.perf_counter()
+    function(items)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('items', type=int, nargs='?', default=20000)
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--write-baseline')
+    arguments = parser.parse_args()
+
+    items = [make_item(index=index) for index in range(arguments.items)]
+    results = {
+        'legacy_items_per_second': items_per_second(lambda batch: [legacy_decode(item) for item in batch], items),
+        'validated_items_per_second': items_per_second(lambda batch: cluster_codec.decode_many(batch), items),
+        'trusted_items_per_second': items_per_second(
+            lambda batch: cluster_codec.decode_many(batch, trusted=True),
+            items
+        )
+    }
+    print(json.dumps(dict({'benchmark': 'cluster_decode', 'items': len(items)}, **results)))
+
+    if arguments.write_baseline:
+        with open(arguments.write_baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        failures = [
+            f"{metric} {result:.0f} < {baseline[metric]:.0f} baseline"
+            for metric, result in results.items()
+            if metric in baseline and result * arguments.tolerance < baseline[metric]
+        ]
+        if failures:
+            print('\n'.join(failures), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Throughput and latency of the main CommonOperations flows, fully offline.
+
+AWS calls are answered by stand_ins.LocalAWS and Cloud Run calls by stand_ins.LocalCloudRunHttp, both with
+the injected latency. Every flow runs --iterations operations spread over --concurrency threads and reports
+operations per second with p50/p99 latencies as JSON. The benchmark fails when a flow regresses by more than
+--tolerance against --baseline. A single scheduler stall delays every operation in flight, so a p99 also has to
+grow by more than --p99-slack-ms to count as a regression.
+
+    python benchmarks/common_operations.py [--iterations 500] [--concurrency 8] [--aws-latency-ms 2]
+                                           [--gcp-latency-ms 5] [--flows get_cluster_information,...]
+                                           [--baseline benchmarks/common_operations_baseline.json] [--tolerance 1.5]
+                                           [--p99-slack-ms 60]
+    python benchmarks/common_operations.py --write-baseline benchmarks/common_operations_baseline.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('TABLE_CLUSTERS', 'clusters')
+
+# Running a benchmark as a script only puts benchmarks/ on sys.path, the package is imported from this checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stand_ins import LocalAWS, LocalCloudRun, LocalCloudRunHttp
+
+from abstractioutils.utils.poller import Poller
+from abstractioutils.clients.common_operations import CommonOperations
+
+QUEUE_URL = 'https://sqs.eu-west-1.amazonaws.com/123456789012/clusters'
+TOPIC_ARN = 'arn:aws:sns:eu-west-1:123456789012:clusters'
+REGION = 'europe-west1'
+
+
+def build_operations(aws: LocalAWS, http: LocalCloudRunHttp, poll_interval: float, cluster_cache_ttl: float = 0):
+    common_operations = CommonOperations(cluster_cache_ttl=cluster_cache_ttl)
+    for provider in (
+        common_operations._dynamodb,
+        common_operations._sqs,
+        common_operations._sns,
+        common_operations._ssm
+    ):
+        aws.attach(client=provider._get_client())
+    common_operations._cloud_run = LocalCloudRun(http=http)
+    common_operations._cloud_run_poller = Poller(deadline=60, initial_delay=poll_interval, max_delay=poll_interval)
+    return common_operations
+
+
+def create_and_poll(common_operations: CommonOperations, index: int) -> None:
+    name = f'cluster-{index}'
+    common_operations._cloud_run.create_cloud_run_service(
+        project_id='project',
+        region=REGION,
+        body={'metadata': {'name': name}, 'spec': {}}
+    )
+    if not common_operations._loop_over_cloud_run_service(
+        cluster_id=name,
+        cloud_run_name=f'namespaces/project/services/{name}',
+        region=REGION,
+        has_ip=False,
+        static_ip=None
+    ):
+        raise RuntimeError(f'Cloud Run service {name} never became ready')
+
+
+FLOWS = {
+    'get_cluster_information': lambda operations, index: operations['uncached'].get_cluster_information(
+        cluster_id=f'cluster-{index}'
+    ),
+    'get_cluster_information_cached': lambda operations, index: operations['cached'].get_cluster_information(
+        cluster_id=f'cluster-{index % 16}'
+    ),
+    'get_cluster_fields': lambda operations, index: operations['uncached'].get_cluster_fields(
+        cluster_id=f'cluster-{index}',
+        fields=['status', 'endpoint']
+    ),
+    'get_clusters_information': lambda operations, index: operations['uncached'].get_clusters_information(
+        cluster_ids=[f'cluster-{index}-{position}' for position in range(100)]
+    ),
+    'update_cluster_information': lambda operations, index: operations['uncached'].update_cluster_information(
+        cluster_id=f'cluster-{index}',
+        expression_attribute_names={'#status': 'status'},
+        expression_attribute_values={':status': {'S': 'COMPLETED'}},
+        update_expression='SET #status = :status'
+    ),
+    'send_message_to_sqs': lambda operations, index: operations['uncached'].send_message_to_sqs(
+        message_body={'cluster_id': f'cluster-{index}'},
+        queue_url=QUEUE_URL
+    ),
+    'send_message_to_sqs_batched': lambda operations, index: operations['uncached'].send_message_to_sqs_batched(
+        message_body={'cluster_id': f'cluster-{index}'},
+        queue_url=QUEUE_URL
+    ).result(),
+    'publish_message_to_sns': lambda operations, index: operations['uncached'].publish_message_to_sns(
+        message_body={'cluster_id': f'cluster-{index}'},
+        topic_arn=TOPIC_ARN
+    ),
+    'ssm_get_parameter': lambda operations, index: operations['uncached']._ssm.get_parameter(
+        name=f'/gcp/project-{index}/sa',
+        use_cache=False
+    ),
+    'ssm_get_parameter_cached': lambda operations, index: operations['uncached']._ssm.get_parameter(
+        name=f'/gcp/project-{index % 16}/sa'
+    ),
+    'cloud_run_create_and_poll': lambda operations, index: create_and_poll(
+        common_operations=operations['uncached'],
+        index=index
+    )
+}
+
+
+def run_flow(flow, operations: dict, iterations: int, concurrency: int) -> dict:
+    def timed(index: int) -> float:
+        start = time.perf_counter()
+        flow(operations, index)
+        return time.perf_counter() - start
+
+    # The first call pays for the client and discovery setup, it is left out of the results
+    flow(operations, iterations)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'operations': iterations,
+        'seconds': elapsed,
+        'ops_per_second': iterations / elapsed,
+        'p50_ms': latencies[int(len(latencies) * 0.50)] * 1000,
+        'p99_ms': latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, p99_slack_ms: float) -> list:
+    failures = list()
+    for flow, result in results.items():
+        if flow not in baseline:
+            continue
+        if result['ops_per_second'] * tolerance < baseline[flow]['ops_per_second']:
+            failures.append(
+                f"{flow} ops_per_second {result['ops_per_second']:.1f} < {baseline[flow]['ops_per_second']:.1f} baseline"
+            )
+        if result['p99_ms'] > baseline[flow]['p99_ms'] * tolerance + p99_slack_ms:
+            failures.append(f"{flow} p99_ms {result['p99_ms']:.2f} > {baseline[flow]['p99_ms']:.2f} baseline")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--aws-latency-ms', type=float, default=2)
+    parser.add_argument('--gcp-latency-ms', type=float, default=5)
+    parser.add_argument('--poll-interval-ms', type=float, default=10)
+    parser.add_argument('--flows', default=','.join(FLOWS))
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--p99-slack-ms', type=float, default=60)
+    parser.add_argument('--write-baseline')
+    arguments = parser.parse_args()
+
+    aws = LocalAWS(latency=arguments.aws_latency_ms / 1000)
+    http = LocalCloudRunHttp(latency=arguments.gcp_latency_ms / 1000)
+    operations = {
+        'uncached': build_operations(aws=aws, http=http, poll_interval=arguments.poll_interval_ms / 1000),
+        'cached': build_operations(
+            aws=aws,
+            http=http,
+            poll_interval=arguments.poll_interval_ms / 1000,
+            cluster_cache_ttl=300
+        )
+    }
+
+    results = dict()
+    for flow in arguments.flows.split(','):
+        results[flow] = run_flow(
+            flow=FLOWS[flow],
+            operations=operations,
+            iterations=arguments.iterations,
+            concurrency=arguments.concurrency
+        )
+    for single_operations in operations.values():
+        single_operations.flush_sqs_messages()
+
+    print(json.dumps({
+        'benchmark': 'common_operations',
+        'parameters': {
+            'iterations': arguments.iterations,
+            'concurrency': arguments.concurrency,
+            'aws_latency_ms': arguments.aws_latency_ms,
+            'gcp_latency_ms': arguments.gcp_latency_ms,
+            'poll_interval_ms': arguments.poll_interval_ms
+        },
+        'results': results,
+        'calls': {'aws': aws.calls, 'gcp': http.requests}
+    }, indent=2))
+
+    if arguments.write_baseline:
+        with open(arguments.write_baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            failures = compare(
+                results=results,
+                baseline=json.load(baseline_file),
+                tolerance=arguments.tolerance,
+                p99_slack_ms=arguments.p99_slack_ms
+            )
+        if failures:
+            print('\n'.join(failures), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
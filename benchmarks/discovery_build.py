@@ -0,0 +1,65 @@
+"""
+Per-call overhead of the Cloud Run client before and after the discovery cache.
+
+"before" fetches the discovery document from a local HTTP mock, parses it and builds
+the service on every call, like the providers used to do. "after" reuses a single
+service object built from the bundled document. Both execute the same mocked request.
+
+    python benchmarks/discovery_build.py [iterations]
+"""
+import os
+import sys
+import json
+import time
+
+# Running a benchmark as a script only puts benchmarks/ on sys.path, the package is imported from this checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from googleapiclient.http import HttpMock
+from googleapiclient.discovery import build_from_document
+
+from abstractioutils.providers.gcp.discovery import get_discovery_document
+
+DISCOVERY_URL = 'https://run.googleapis.com/$discovery/rest?version=v1'
+SERVICE_NAME = 'namespaces/project/services/cluster'
+
+
+def run_before(iterations: int, discovery_http: HttpMock, api_http: HttpMock) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _, content = discovery_http.request(DISCOVERY_URL)
+        service = build_from_document(content, http=api_http)
+        service.namespaces().services().get(name=SERVICE_NAME).execute()
+    return time.perf_counter() - start
+
+
+def run_after(iterations: int, api_http: HttpMock) -> float:
+    start = time.perf_counter()
+    service = build_from_document(get_discovery_document(api='run', version='v1'), http=api_http)
+    for _ in range(iterations):
+        service.namespaces().services().get(name=SERVICE_NAME).execute()
+    return time.perf_counter() - start
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    discovery_http = HttpMock(headers={'status': '200'})
+    discovery_http.data = json.dumps(get_discovery_document(api='run', version='v1'))
+    api_http = HttpMock(headers={'status': '200'})
+    api_http.data = json.dumps({'metadata': {'name': 'cluster'}, 'status': {}})
+
+    before = run_before(iterations=iterations, discovery_http=discovery_http, api_http=api_http)
+    after = run_after(iterations=iterations, api_http=api_http)
+
+    print(json.dumps({
+        'benchmark': 'discovery_build',
+        'iterations': iterations,
+        'before_ms_per_call': before / iterations * 1000,
+        'after_ms_per_call': after / iterations * 1000,
+        'speedup': before / after
+    }))
+
+
+if __name__ == '__main__':
+    main()
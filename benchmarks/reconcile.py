@@ -0,0 +1,121 @@
+"""
+Cost of checking the clusters table against Cloud Run, per cluster and with the region-parallel reconciler.
+
+"per_cluster" calls CloudRun.get_service once for every cluster with --concurrency threads, "reconciler"
+runs ClusterReconciler, which lists every region once. Both run against the local stand-ins with the
+injected latency and report the seconds taken and the number of GCP requests.
+
+    python benchmarks/reconcile.py [--clusters 2000] [--regions 4] [--concurrency 8] [--gcp-latency-ms 20] [--fix]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('TABLE_CLUSTERS', 'clusters')
+
+# Running a benchmark as a script only puts benchmarks/ on sys.path, the package is imported from this checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stand_ins import LocalAWS, LocalCloudRun, LocalCloudRunHttp, LocalGcpProviderPool, make_cluster_item
+
+from abstractioutils.clients.cluster_reconciler import ClusterReconciler
+from abstractioutils.clients.common_operations import CommonOperations
+
+REGIONS = ('europe-west1', 'europe-west4', 'us-central1', 'us-east1', 'asia-east1', 'asia-northeast1')
+
+
+def make_items(clusters: int, regions: int) -> list:
+    items = list()
+    for index in range(clusters):
+        item = make_cluster_item(cluster_id=f'cluster-{index}')
+        item['region'] = {'S': REGIONS[index % regions]}
+        if index % 20 == 1:
+            item['status'] = {'S': 'PENDING'}
+        items.append(item)
+    return items
+
+
+def scan_responder(items: list):
+    def respond(params: dict) -> dict:
+        start = int(params.get('ExclusiveStartKey', {}).get('id', {}).get('S', '0'))
+        end = start + params.get('Limit', 1000)
+        page = {'Items': items[start:end], 'Count': len(items[start:end])}
+        if end < len(items):
+            page['LastEvaluatedKey'] = {'id': {'S': str(end)}}
+        return page
+    return respond
+
+
+def run_per_cluster(cloud_run: LocalCloudRun, items: list, concurrency: int) -> float:
+    def get(item: dict):
+        try:
+            return cloud_run.get_service(
+                name=f"namespaces/{item['gcp_project']['S']}/services/{item['id']['S']}",
+                region=item['region']['S']
+            )
+        except Exception:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(get, items))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clusters', type=int, default=2000)
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--gcp-latency-ms', type=float, default=20)
+    parser.add_argument('--fix', action='store_true')
+    arguments = parser.parse_args()
+
+    items = make_items(clusters=arguments.clusters, regions=arguments.regions)
+    aws = LocalAWS()
+    aws.respond_to('Scan', scan_responder(items=items))
+    http = LocalCloudRunHttp(latency=arguments.gcp_latency_ms / 1000)
+    # One cluster in ten has no service, one in twenty is still PENDING and every region has a service without a cluster
+    for index, item in enumerate(items):
+        if index % 10:
+            http.add_service(region=item['region']['S'], project='project', name=item['id']['S'])
+    for region in REGIONS[:arguments.regions]:
+        http.add_service(region=region, project='project', name=f'orphan-{region}')
+
+    common_operations = CommonOperations()
+    aws.attach(client=common_operations._dynamodb._get_client())
+    cloud_run = LocalCloudRun(http=http)
+    common_operations._gcp_providers = LocalGcpProviderPool(cloud_run=cloud_run)
+
+    requests = http.requests
+    per_cluster_seconds = run_per_cluster(cloud_run=cloud_run, items=items, concurrency=arguments.concurrency)
+    per_cluster_requests, requests = http.requests - requests, http.requests
+
+    reconciler = ClusterReconciler(common_operations=common_operations, max_workers=arguments.concurrency)
+    report = reconciler.reconcile(fix=arguments.fix)
+    reconciler_requests = http.requests - requests
+
+    print(json.dumps({
+        'benchmark': 'reconcile',
+        'clusters': arguments.clusters,
+        'regions': arguments.regions,
+        'per_cluster_seconds': per_cluster_seconds,
+        'per_cluster_gcp_requests': per_cluster_requests,
+        'reconciler_seconds': report.elapsed,
+        'reconciler_gcp_requests': reconciler_requests,
+        'missing': len(report.missing),
+        'orphaned': len(report.orphaned),
+        'mismatched': len(report.mismatched),
+        'fixed': len(report.fixed)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Local stand-ins for AWS and Cloud Run used by the offline benchmarks.
+
+LocalAWS answers botocore calls from the same before-call hook botocore's Stubber uses, but with canned
+responses per operation instead of an ordered queue, so it can serve any number of concurrent calls.
+LocalCloudRunHttp is an httplib2-compatible transport for googleapiclient that reports a service as Ready
+after a fixed number of polls. Both sleep for their injected latency before answering.
+"""
+import json
+import time
+import uuid
+import threading
+
+from urllib.parse import urlparse, parse_qs
+
+from botocore.awsrequest import AWSResponse
+from httplib2 import Response
+from googleapiclient.discovery import build_from_document
+
+from abstractioutils.providers.gcp.cloud_run import CloudRun
+from abstractioutils.providers.gcp.discovery import get_discovery_document
+
+
+def make_cluster_item(cluster_id: str) -> dict:
+    return {
+        'id': {'S': cluster_id},
+        'image_url': {'S': 'gcr.io/project/image:latest'},
+        'vcpus': {'N': '2'},
+        'memory': {'N': '4096'},
+        'user_id': {'S': 'user'},
+        'port': {'N': '8080'},
+        'has_ip': {'BOOL': False},
+        'type': {'S': 'cloud_run'},
+        'region': {'S': 'europe-west1'},
+        'status': {'S': 'COMPLETED'},
+        'creation_date': {'S': '2021-04-01T10:00:00'},
+        'env_variables': {'SS': [f'KEY_{key}=value={key}' for key in range(10)]},
+        'gcp_project': {'S': 'project'},
+        'endpoint': {'S': f'https://{cluster_id}.a.run.app'}
+    }
+
+
+def project(item: dict, params: dict) -> dict:
+    # Applies the ProjectionExpression of the call, if any, like DynamoDB does
+    if 'ProjectionExpression' not in params:
+        return item
+    names = params.get('ExpressionAttributeNames', dict())
+    attributes = [names.get(name.strip(), name.strip()) for name in params['ProjectionExpression'].split(',')]
+    return {attribute: item[attribute] for attribute in attributes if attribute in item}
+
+
+class LocalAWS(object):
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.calls = dict()
+        self._lock = threading.Lock()
+        self._responders = {
+            'GetItem': lambda params: {
+                'Item': project(item=make_cluster_item(cluster_id=params['Key']['id']['S']), params=params)
+            },
+            'BatchGetItem': lambda params: {
+                'Responses': {
+                    table: [make_cluster_item(cluster_id=key['id']['S']) for key in request['Keys']]
+                    for table, request in params['RequestItems'].items()
+                },
+                'UnprocessedKeys': {}
+            },
+            'UpdateItem': lambda params: {'Attributes': {'status': {'S': 'COMPLETED'}}},
+            'SendMessage': lambda params: {'MessageId': str(uuid.uuid4())},
+            'SendMessageBatch': lambda params: {
+                'Successful': [
+                    {'Id': entry['Id'], 'MessageId': str(uuid.uuid4()), 'MD5OfMessageBody': ''}
+                    for entry in params['Entries']
+                ],
+                'Failed': []
+            },
+            'Publish': lambda params: {'MessageId': str(uuid.uuid4())},
+            'GetParameter': lambda params: {
+                'Parameter': {'Name': params['Name'], 'Type': 'SecureString', 'Value': '{}'}
+            }
+        }
+
+    def respond_to(self, operation: str, responder) -> None:
+        # responder receives the API parameters of the call and returns the parsed response
+        self._responders[operation] = responder
+
+    def attach(self, client) -> None:
+        # Clients are shared through the registry, attaching twice to the same client is a no-op
+        client.meta.events.register(
+            'before-parameter-build.*.*',
+            self._capture_params,
+            unique_id=f'local-aws-params-{id(self)}'
+        )
+        client.meta.events.register_first('before-call.*.*', self._respond, unique_id=f'local-aws-{id(self)}')
+
+    @staticmethod
+    def _capture_params(params: dict, context: dict, **kwargs) -> None:
+        context['local_aws_params'] = dict(params)
+
+    def _respond(self, model, context: dict, **kwargs):
+        with self._lock:
+            self.calls[model.name] = self.calls.get(model.name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = self._responders[model.name](context['local_aws_params'])
+        parsed.setdefault('ResponseMetadata', {'HTTPStatusCode': 200, 'RetryAttempts': 0})
+        return AWSResponse(None, 200, {}, None), parsed
+
+
+class LocalCloudRunHttp(object):
+    # Only the service create, get and list calls used by the benchmarks are routed, everything else is a 404.
+    # Services are kept per endpoint host, so every region has its own.
+    def __init__(self, latency: float = 0, polls_until_ready: int = 2):
+        self.latency = latency
+        self.polls_until_ready = polls_until_ready
+        self.requests = 0
+        self._polls = dict()
+        self._lock = threading.Lock()
+
+    def add_service(self, region: str, project: str, name: str, ready: bool = True) -> None:
+        with self._lock:
+            key = f'{region}-run.googleapis.com/namespaces/{project}/services/{name}'
+            self._polls[key] = self.polls_until_ready if ready else 0
+
+    def request(self, uri: str, method: str = 'GET', body=None, headers=None, redirections=1, connection_type=None):
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(uri)
+        path = f"{url.netloc}/{url.path.split('/apis/serving.knative.dev/v1/', 1)[-1]}"
+        with self._lock:
+            self.requests += 1
+            if method == 'POST' and path.endswith('/services'):
+                service = json.loads(body)
+                self._polls[f"{path}/{service['metadata']['name']}"] = 0
+                return self._response(status=200, content=dict(service, status={}))
+            if method == 'GET' and path.endswith('/services'):
+                return self._response(status=200, content=self._list(path=path, query=parse_qs(url.query)))
+            if method == 'GET' and path in self._polls:
+                self._polls[path] += 1
+                return self._response(status=200, content=self._service(name=path, polls=self._polls[path]))
+        return self._response(status=404, content={'error': {'code': 404, 'message': f'{path} not found'}})
+
+    def _list(self, path: str, query: dict) -> dict:
+        names = sorted(name for name in self._polls if name.startswith(f'{path}/'))
+        offset = int(query.get('continue', ['0'])[0])
+        limit = int(query.get('limit', ['500'])[0])
+        page = {'items': [self._service(name=name, polls=self._polls[name]) for name in names[offset:offset + limit]]}
+        if offset + limit < len(names):
+            page['metadata'] = {'continue': str(offset + limit)}
+        return page
+
+    def _service(self, name: str, polls: int) -> dict:
+        ready = 'True' if polls >= self.polls_until_ready else 'Unknown'
+        return {
+            'metadata': {'name': name.rsplit('/', 1)[-1]},
+            'status': {
+                'url': f"https://{name.rsplit('/', 1)[-1]}.a.run.app",
+                'conditions': [{'type': 'Ready', 'status': ready}]
+            }
+        }
+
+    @staticmethod
+    def _response(status: int, content: dict):
+        return Response({'status': str(status)}), json.dumps(content).encode('utf-8')
+
+
+class LocalCloudRun(CloudRun):
+    # CloudRun whose API calls go to a LocalCloudRunHttp, no credentials are needed
+    def __init__(self, http: LocalCloudRunHttp):
+        super().__init__(service_account_info=None)
+        self._http = http
+        self._services = dict()
+
+    def _get_service(self, api: str, version: str, api_endpoint: str = None):
+        if api_endpoint not in self._services:
+            self._services[api_endpoint] = build_from_document(
+                get_discovery_document(api='run', version='v1'),
+                http=self._http,
+                client_options={'api_endpoint': api_endpoint} if api_endpoint else None
+            )
+        return self._services[api_endpoint]
+
+
+class LocalGcpProviderPool(object):
+    # Stands in for GcpProviderPool, every project gets the same LocalCloudRun
+    def __init__(self, cloud_run: LocalCloudRun):
+        self.cloud_run = cloud_run
+        self.compute_engine = None
+
+    def get(self, project: str):
+        return self
@@ -0,0 +1,116 @@
+"""
+Cold start cost of every entry point: import time and first-call latency, each measured in a fresh interpreter.
+
+Importing an entry point must not pull in boto3, googleapiclient, google-auth or pydantic; the
+benchmark fails when it does, or when a timing regresses by more than --tolerance against --baseline.
+
+    python benchmarks/startup.py [--runs 5] [--baseline benchmarks/startup_baseline.json] [--tolerance 1.5]
+    python benchmarks/startup.py --write-baseline benchmarks/startup_baseline.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# The probes import the package from this checkout, wherever the benchmark is run from
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('boto3', 'botocore', 'googleapiclient', 'google.oauth2', 'google.auth', 'pydantic')
+
+FIRST_CALL_SETUP = {
+    'abstractioutils.clients.common_operations': 'module.CommonOperations()._dynamodb._get_client()',
+    'abstractioutils.clients.async_common_operations': 'module.AsyncCommonOperations().close()',
+    'abstractioutils.clients.provisioning_orchestrator': (
+        'module.ProvisioningOrchestrator()._common_operations._dynamodb._get_client()'
+    ),
+    'abstractioutils.clients.gcp_provider_pool': (
+        'from abstractioutils.providers.aws.ssm import SSM\n'
+        'module.GcpProviderPool(ssm=SSM())\n'
+        'module.GcpProviders(project="project", service_account_info=None)'
+    ),
+    'abstractioutils.clients.cluster_reconciler': 'module.ClusterReconciler()._common_operations._dynamodb._get_client()',
+    'abstractioutils.providers.aws.dynamodb': 'module.DynamoDB()._get_client()',
+    'abstractioutils.providers.aws.sqs': 'module.SQS()._get_client()',
+    'abstractioutils.providers.aws.sns': 'module.SNS()._get_client()',
+    'abstractioutils.providers.aws.ssm': 'module.SSM()._get_client()',
+    'abstractioutils.providers.gcp.cloud_run': (
+        'from google.auth.credentials import AnonymousCredentials\n'
+        'from abstractioutils.providers.gcp.discovery import build_service\n'
+        'build_service("run", "v1", credentials=AnonymousCredentials())'
+    ),
+    'abstractioutils.providers.gcp.compute_engine': (
+        'from google.auth.credentials import AnonymousCredentials\n'
+        'from abstractioutils.providers.gcp.discovery import build_service\n'
+        'build_service("compute", "v1", credentials=AnonymousCredentials())'
+    )
+}
+
+PROBE = '''
+import sys, json, time, importlib
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+import_ms = (time.perf_counter() - start) * 1000
+loaded = [name for name in {heavy!r} if name in sys.modules]
+start = time.perf_counter()
+exec({first_call!r})
+first_call_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{'import_ms': import_ms, 'first_call_ms': first_call_ms, 'heavy_modules_on_import': loaded}}))
+'''
+
+
+def measure(module: str, runs: int) -> dict:
+    environment = dict(
+        os.environ,
+        AWS_DEFAULT_REGION=os.environ.get('AWS_DEFAULT_REGION', 'eu-west-1'),
+        PYTHONPATH=os.pathsep.join(filter(None, (REPO_ROOT, os.environ.get('PYTHONPATH'))))
+    )
+    samples = list()
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES, first_call=FIRST_CALL_SETUP[module])],
+            env=environment
+        )
+        samples.append(json.loads(output.decode().strip().splitlines()[-1]))
+
+    return {
+        'import_ms': sorted(sample['import_ms'] for sample in samples)[runs // 2],
+        'first_call_ms': sorted(sample['first_call_ms'] for sample in samples)[runs // 2],
+        'heavy_modules_on_import': samples[0]['heavy_modules_on_import']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--write-baseline')
+    arguments = parser.parse_args()
+
+    results = {module: measure(module=module, runs=arguments.runs) for module in FIRST_CALL_SETUP}
+    print(json.dumps({'benchmark': 'startup', 'results': results}, indent=2))
+
+    if arguments.write_baseline:
+        with open(arguments.write_baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+    failures = [
+        f"{module} imports {', '.join(result['heavy_modules_on_import'])}"
+        for module, result in results.items() if result['heavy_modules_on_import']
+    ]
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        for module, result in results.items():
+            for metric in ('import_ms', 'first_call_ms'):
+                if module in baseline and result[metric] > baseline[module][metric] * arguments.tolerance:
+                    failures.append(f"{module} {metric} {result[metric]:.1f} > {baseline[module][metric]:.1f} baseline")
+
+    if failures:
+        print('\n'.join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -26,5 +26,6 @@ setup(
     ],
     packages=find_packages(exclude=("tests",)),
     include_package_data=True,
-    install_requires=["boto3==1.16.63", "pydantic==1.8.1", "oauth2client==4.1.3", "google-api-python-client==1.8.0", "google-auth==1.28.1"],
+    package_data={"abstractioutils.providers.gcp": ["discovery_documents/*.json.gz"]},
+    install_requires=["boto3==1.20.8", "pydantic==1.8.1", "oauth2client==4.1.3", "google-api-python-client==1.8.0", "google-auth==1.28.1"],
 )
@@ -0,0 +1,150 @@
+import types
+import threading
+import unittest
+
+from unittest import mock
+
+from abstractioutils.providers.aws import sqs_batch_sender
+from abstractioutils.providers.aws.sqs_batch_sender import SQSBatchSender
+from abstractioutils.utils.rate_limiter import AdaptiveRateLimiter
+from abstractioutils.exceptions.aws.sqs_exception import SQSException
+
+
+class RecordingSQS(object):
+    # Answers every SendMessageBatch call with a success for each entry, unless a response is queued
+    def __init__(self):
+        self.batches = list()
+        self.responses = list()
+        self.limiter = AdaptiveRateLimiter()
+        self._lock = threading.Lock()
+
+    def send_message_batch(self, queue_url: str, entries: list) -> dict:
+        with self._lock:
+            self.batches.append(entries)
+            if self.responses:
+                return self.responses.pop(0)
+        return {'Successful': [{'Id': entry['Id'], 'MessageId': f"message-{entry['Id']}"} for entry in entries]}
+
+    def _get_region(self):
+        return None
+
+    def _get_rate_limiter(self):
+        return self.limiter
+
+
+class BlockingSQS(RecordingSQS):
+    # Holds every call until released, so a batch can be kept in flight
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def send_message_batch(self, queue_url: str, entries: list) -> dict:
+        self.entered.set()
+        self.released.wait()
+        return super().send_message_batch(queue_url=queue_url, entries=entries)
+
+
+class RecordingCondition(threading.Condition):
+    # Tells the test when the background thread is in the timed wait of a pending batch
+    def __init__(self):
+        super().__init__()
+        self.timed_wait = threading.Event()
+
+    def wait(self, timeout=None):
+        if timeout is not None:
+            self.timed_wait.set()
+        return super().wait(timeout)
+
+
+class TestSQSBatchSender(unittest.TestCase):
+    def test_flush_during_latency_wait(self):
+        sqs = RecordingSQS()
+        recording_threading = types.SimpleNamespace(Condition=RecordingCondition, Thread=threading.Thread)
+        with mock.patch.object(sqs_batch_sender, 'threading', recording_threading):
+            sender = SQSBatchSender(queue_url='queue', sqs=sqs, max_latency=60)
+        self.addCleanup(sender.close)
+
+        first = sender.send(message_body={'index': 0})
+        self.assertTrue(sender._condition.timed_wait.wait(timeout=5))
+        sender.flush()
+        self.assertEqual(first.result(timeout=0), 'message-0')
+
+        # The background thread survived the flush if it still sends a full batch on its own
+        futures = [sender.send(message_body={'index': index}) for index in range(10)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [f'message-{index}' for index in range(10)])
+        self.assertTrue(sender._thread.is_alive())
+
+    def test_flush_waits_for_the_batch_in_flight(self):
+        sqs = BlockingSQS()
+        sender = SQSBatchSender(queue_url='queue', sqs=sqs, max_latency=0)
+        self.addCleanup(sender.close)
+        self.addCleanup(sqs.released.set)
+
+        future = sender.send(message_body={'index': 0})
+        self.assertTrue(sqs.entered.wait(timeout=5))
+        flusher = threading.Thread(target=sender.flush)
+        flusher.start()
+        flusher.join(timeout=0.1)
+        self.assertTrue(flusher.is_alive())
+        self.assertFalse(future.done())
+
+        sqs.released.set()
+        flusher.join(timeout=5)
+        self.assertFalse(flusher.is_alive())
+        self.assertEqual(future.result(timeout=0), 'message-0')
+
+    def test_malformed_response_fails_the_batch_and_keeps_the_thread(self):
+        sqs = RecordingSQS()
+        sqs.responses.append({'Successful': [{'Id': '0'}]})
+        sender = SQSBatchSender(queue_url='queue', sqs=sqs, max_latency=60)
+        self.addCleanup(sender.close)
+
+        failed = sender.send(message_body={'index': 0})
+        sender.flush()
+        self.assertIsInstance(failed.exception(timeout=0), SQSException)
+
+        futures = [sender.send(message_body={'index': index}) for index in range(10)]
+        self.assertEqual(len([future.result(timeout=5) for future in futures]), 10)
+        self.assertTrue(sender._thread.is_alive())
+
+    def test_throttled_entries_are_retried(self):
+        sqs = RecordingSQS()
+        sqs.responses.append({
+            'Successful': [{'Id': '0', 'MessageId': 'message-0'}],
+            'Failed': [{'Id': '1', 'Code': 'RequestThrottled', 'SenderFault': False}]
+        })
+        sender = SQSBatchSender(queue_url='queue', sqs=sqs, max_latency=60)
+        self.addCleanup(sender.close)
+
+        futures = [sender.send(message_body={'index': index}) for index in range(2)]
+        sender.flush()
+        self.assertEqual([future.result(timeout=0) for future in futures], ['message-0', 'message-1'])
+        self.assertEqual([len(entries) for entries in sqs.batches], [2, 1])
+        self.assertEqual(sqs.limiter.throttles, 1)
+
+    def test_entries_still_throttled_fail_with_429(self):
+        sqs = RecordingSQS()
+        sqs.responses.extend([{'Failed': [{'Id': '0', 'Code': 'RequestThrottled', 'SenderFault': False}]}] * 3)
+        sender = SQSBatchSender(queue_url='queue', sqs=sqs, max_latency=60, max_attempts=3)
+        self.addCleanup(sender.close)
+
+        future = sender.send(message_body={'index': 0})
+        sender.flush()
+        self.assertEqual(future.exception(timeout=0).status_code, 429)
+        self.assertEqual(len(sqs.batches), 3)
+
+    def test_close_drains_the_buffer(self):
+        sqs = RecordingSQS()
+        sender = SQSBatchSender(queue_url='queue', sqs=sqs, max_latency=60)
+
+        future = sender.send(message_body={'index': 0})
+        sender.close()
+        self.assertEqual(future.result(timeout=0), 'message-0')
+        self.assertFalse(sender._thread.is_alive())
+        with self.assertRaises(SQSException):
+            sender.send(message_body={'index': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()